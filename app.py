@@ -1,6 +1,9 @@
 import streamlit as st
 
 from auth import enforce_email_login, render_logout_button
+from data import acquire_dataset, hash_bytes
+from metrics import record_rerun
+from profiling import finish_page_profile, phase, start_page_profile
 
 st.set_page_config(
     page_title="Home",       
@@ -8,6 +11,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+record_rerun("Home")
+
 enforce_email_login()
 render_logout_button()
 
@@ -40,6 +45,8 @@ with col2:
 
 st.markdown("---")
 
+profile = start_page_profile("Home")
+
 # ===================== WELCOME MESSAGE =====================
 st.markdown("## Welcome")
 st.write("Upload your Excel file once, then choose a page below.")
@@ -48,8 +55,18 @@ st.write("Upload your Excel file once, then choose a page below.")
 uploaded_file = st.file_uploader("Upload Excel file", type=["xlsx"])
 
 if uploaded_file is not None:
-    st.session_state["uploaded_excel_bytes"] = uploaded_file.getvalue()
-    st.session_state["uploaded_excel_name"] = uploaded_file.name
+    if st.session_state.get("uploaded_excel_file_id") != uploaded_file.file_id:
+        excel_bytes = uploaded_file.getvalue()
+        excel_hash = hash_bytes(excel_bytes)
+
+        with st.spinner("Reading workbook..."), phase("dataset"):
+            # The session keeps only a handle; the workbook itself lives in
+            # the shared dataset store.
+            st.session_state["dataset_handle"] = acquire_dataset(excel_hash, excel_bytes)
+
+        st.session_state["uploaded_excel_name"] = uploaded_file.name
+        st.session_state["uploaded_excel_file_id"] = uploaded_file.file_id
+
     st.success(f"Loaded file: {uploaded_file.name}")
 elif "uploaded_excel_name" in st.session_state:
     st.success(f"Using uploaded file: {st.session_state['uploaded_excel_name']}")
@@ -73,3 +90,5 @@ with col3:
         st.switch_page("pages/3_Coach_Comparison_View.py")
 
 st.markdown("---")
+
+finish_page_profile(profile)
@@ -0,0 +1 @@
+"""Performance tooling for the dashboard; run the modules with ``python -m``."""
@@ -0,0 +1,128 @@
+"""Micro-benchmarks for the dashboard's hot paths.
+
+Usage:
+    python -m benchmarks.bench --sizes 50 500 5000 --output bench.json
+
+Times ingestion, block assignment, score mapping, group totals, the block
+comparison table and a single PDF report separately on synthetic workbooks,
+and prints the results as JSON so runs can be diffed for regressions.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.workbook import make_workbook
+from components import comparison_table_html
+from constants import QUESTION_COLS
+from data import (
+    assign_blocks,
+    build_dataset,
+    build_tables,
+    map_scores,
+    read_workbook,
+    select_engine
+)
+from report import coach_report_args, generate_pdf, report_template
+from scoring import ScoreEngine
+
+DEFAULT_SIZES = [50, 500, 5000]
+
+
+def _time(fn, repeat: int) -> tuple:
+    """Run ``fn`` repeatedly; return its last result and the timing summary."""
+    timings = []
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+
+    return result, {
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "runs": repeat
+    }
+
+
+def bench_size(coaches: int, blocks: int, repeat: int) -> dict:
+    data = make_workbook(coaches, blocks)
+    phases = {}
+
+    read_df, phases["ingestion"] = _time(lambda: read_workbook(data), repeat)
+    raw_df, phases["block_assignment"] = _time(lambda: assign_blocks(read_df), repeat)
+
+    question_cols = [c for c in raw_df.columns if c in QUESTION_COLS]
+    scores, phases["score_mapping"] = _time(
+        lambda: map_scores(raw_df, question_cols), repeat
+    )
+
+    raw_table, scores_table = build_tables(raw_df, scores)
+    dataset = build_dataset(
+        "benchmark",
+        scores_table.to_pandas(split_blocks=True),
+        raw_table.to_pandas
+    )
+
+    # Builds the coach x block x question tensor and every total from it.
+    engine, phases["group_totals"] = _time(
+        lambda: ScoreEngine(dataset.scores, dataset.question_cols),
+        repeat
+    )
+
+    coach = engine.coaches[0]
+    block = engine.blocks[0]
+
+    _, phases["comparison_table"] = _time(
+        lambda: comparison_table_html(*engine.block_history(coach)), repeat
+    )
+    # The template is built once per process; time the per-report work.
+    report_template()
+    _, phases["generate_pdf"] = _time(
+        lambda: generate_pdf(*coach_report_args(dataset, coach, block)), repeat
+    )
+
+    return {
+        "coaches": coaches,
+        "blocks": blocks,
+        "rows": len(raw_df),
+        "workbook_bytes": len(data),
+        "excel_engine": select_engine(len(data)),
+        "phases": phases
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Numbers of coaches to benchmark")
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [
+            bench_size(coaches, args.blocks, args.repeat)
+            for coaches in args.sizes
+        ]
+    }
+
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cold-start import cost of every page and of the lazily loaded libraries.
+
+Usage:
+    python -m benchmarks.import_cost --rounds 5
+
+Each measurement runs in a fresh interpreter, as after a deploy or container
+restart. For every page it times the page's top-level imports and lists which
+of the heavy libraries they pull in eagerly. Each lazy library is then timed
+on its own, on top of the imports every page shares, which is what the first
+feature to use it pays. Results (median milliseconds) are printed as JSON.
+"""
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = [
+    "app.py",
+    "pages/1_Individual_Coach_View.py",
+    "pages/2_Block_Average_View.py",
+    "pages/3_Coach_Comparison_View.py"
+]
+
+# Loaded on first use by the feature that needs them.
+LAZY_MODULES = ["openpyxl", "reportlab.platypus"]
+
+# What every page imports before any feature runs.
+SHARED_IMPORTS = "import streamlit\nimport data\n"
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def page_imports(path: Path) -> str:
+    """The page's module-level import statements, as source."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+
+    return "\n".join(
+        ast.unparse(node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def probe(imports: str, setup: str = "") -> dict:
+    """Time ``imports`` in a fresh interpreter after running ``setup`` untimed."""
+    code = setup + _PROBE.format(imports=imports, lazy=LAZY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_ms(runs: list) -> float:
+    return round(statistics.median(run["ms"] for run in runs), 1)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure cold-start import cost.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    pages = {}
+
+    for page in PAGES:
+        runs = [probe(page_imports(ROOT / page)) for _ in range(args.rounds)]
+        pages[page] = {"import_ms": median_ms(runs), "eager_heavy": runs[0]["loaded"]}
+
+    lazy = {}
+
+    for module in LAZY_MODULES:
+        runs = [probe(f"import {module}", SHARED_IMPORTS) for _ in range(args.rounds)]
+        lazy[module] = {"first_use_ms": median_ms(runs)}
+
+    text = json.dumps({"rounds": args.rounds, "pages": pages, "lazy": lazy}, indent=2)
+
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Per-dataset memory before and after the compact representation.
+
+Usage:
+    python -m benchmarks.memory --sizes 50 500 5000 --blocks 4
+
+"Before" is the layout the pages originally built on every rerun. That is
+``pd.read_excel`` of the whole sheet as object columns, plus a full
+``raw_df.copy()`` whose answer columns are mapped to float64 scores. "After"
+is the shared ``Dataset``: categorical coach and block names, int8 answer
+codes, and the raw answer text (loaded only for the question details). The
+score tensor the engine builds is reported separately because both layouts
+need it. Results are printed as JSON.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+import data
+from benchmarks.workbook import make_workbook
+from constants import QUESTION_COLS, SCORE_MAP
+
+DEFAULT_SIZES = [50, 500, 5000]
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def legacy_bytes(workbook: bytes) -> dict:
+    """Memory held by the original per-page raw_df and scored copy."""
+    raw_df = pd.read_excel(BytesIO(workbook))
+    raw_df.columns = raw_df.columns.str.strip()
+    raw_df["Block_Number"] = raw_df.groupby("Full Name").cumcount() + 1
+    raw_df["Block_Name"] = "Block " + raw_df["Block_Number"].astype(str)
+
+    df = raw_df.copy()
+    for col in [c for c in df.columns if c in QUESTION_COLS]:
+        df[col] = df[col].map(SCORE_MAP)
+
+    return {
+        "raw": _frame_bytes(raw_df),
+        "scores": _frame_bytes(df),
+        "total": _frame_bytes(raw_df) + _frame_bytes(df)
+    }
+
+
+def compact_bytes(workbook: bytes) -> dict:
+    """Memory held by a Dataset loaded from its snapshot, with raw answers loaded."""
+    dataset = data.load_dataset(data.hash_bytes(workbook), workbook)
+    dataset.raw
+    report = dataset.memory_report()
+
+    raw_path, scores_path = data.snapshot_paths(dataset.content_hash)
+
+    return {
+        "raw": report["raw"],
+        "scores": report["scores"],
+        "total": report["raw"] + report["scores"],
+        "engine": report["engine"],
+        "snapshot_bytes": raw_path.stat().st_size + scores_path.stat().st_size
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Report per-dataset memory use.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Numbers of coaches to measure")
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--output", type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Keep the benchmark's snapshots out of the app's cache directory.
+        data.CACHE_DIR = Path(cache_dir)
+
+        for coaches in args.sizes:
+            workbook = make_workbook(coaches, args.blocks)
+            before = legacy_bytes(workbook)
+            after = compact_bytes(workbook)
+
+            results.append({
+                "coaches": coaches,
+                "blocks": args.blocks,
+                "workbook_bytes": len(workbook),
+                "before": before,
+                "after": after,
+                "reduction": round(1 - after["total"] / before["total"], 3)
+            })
+
+    text = json.dumps({"results": results}, indent=2)
+
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""End-to-end rerun latency for every page, driven through Streamlit's AppTest.
+
+Usage:
+    python -m benchmarks.rerun_latency --coaches 200 --blocks 4 --rounds 10
+
+Each page, Home (``app.py``) included, runs in its own simulated session. The
+harness signs in through the login form, installs a synthetic upload the way
+the Home page stores it, then replays realistic interactions (switching
+coaches, toggling the coach multiselect, building coach/block comparisons).
+AppTest cannot drive the file uploader, so Home is timed on its first load,
+login and plain reruns with the upload in place. It reports p50/p95 rerun time
+per page and per widget as JSON.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from auth import ALLOWED_EMAILS
+from benchmarks.workbook import make_workbook
+from data import acquire_dataset, hash_bytes, load_dataset
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LOGIN_EMAIL = sorted(ALLOWED_EMAILS)[0]
+
+
+class Session:
+    """One simulated browser session on a page, timing every rerun."""
+
+    def __init__(self, page: str, timings: dict, timeout: float):
+        self.page = page
+        self.timings = timings
+        self.app = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+
+    def run(self, action: str) -> None:
+        started = time.perf_counter()
+        self.app.run()
+        self.timings[self.page][action].append(time.perf_counter() - started)
+
+        if self.app.exception:
+            raise RuntimeError(f"{self.page} failed after {action}: {self.app.exception[0].value}")
+
+    def widget(self, kind: str, label: str, n: int = 0):
+        return [w for w in getattr(self.app, kind) if w.label == label][n]
+
+    def login(self, excel_name: str, excel_bytes: bytes) -> None:
+        self.run("first load")
+        self.widget("text_input", "Email address").input(LOGIN_EMAIL)
+        self.widget("button", "Log in").click()
+
+        # Mirror what the Home page stores after an upload; AppTest cannot
+        # drive a file uploader.
+        self.app.session_state["dataset_handle"] = acquire_dataset(
+            hash_bytes(excel_bytes), excel_bytes
+        )
+        self.app.session_state["uploaded_excel_name"] = excel_name
+
+        self.run("login")
+
+    def select(self, label: str, value, n: int = 0) -> None:
+        self.widget("selectbox", label, n).set_value(value)
+        self.run(f"selectbox: {label}")
+
+
+def home(session: Session, dataset, rng, rounds: int) -> None:
+    for _ in range(rounds):
+        session.run("rerun")
+
+
+def individual_coach_view(session: Session, dataset, rng, rounds: int) -> None:
+    coaches = dataset.block_coaches(dataset.block_names[0])
+    session.select("Select Block", dataset.block_names[0])
+
+    for _ in range(rounds):
+        session.select("Select Coach", rng.choice(coaches))
+
+    for _ in range(rounds):
+        session.select("Select Block", rng.choice(dataset.block_names))
+
+
+def block_average_view(session: Session, dataset, rng, rounds: int) -> None:
+    for block in rng.sample(dataset.block_names, min(rounds, len(dataset.block_names))):
+        session.select("Select Block", block)
+        coaches = sorted(set(dataset.block_coaches(block)))
+
+        for _ in range(rounds):
+            multiselect = session.widget("multiselect", "Choose which coaches to include")
+            multiselect.unselect(rng.choice(coaches))
+            session.run("multiselect: remove coach")
+
+            multiselect = session.widget("multiselect", "Choose which coaches to include")
+            multiselect.set_value(coaches)
+            session.run("multiselect: restore all")
+
+
+def coach_comparison_view(session: Session, dataset, rng, rounds: int) -> None:
+    engine = dataset.engine
+    pairs = [(c, b) for c in engine.coaches for b in engine.blocks if engine.has(c, b)]
+
+    # Grow the comparison a handful of pairs at a time, as when lining up
+    # an age group's staff across blocks.
+    selected = []
+    for _ in range(rounds):
+        selected = selected + rng.sample(
+            [p for p in pairs if p not in selected], min(5, len(pairs) - len(selected))
+        )
+        session.widget("multiselect", "Coach and block").set_value(selected)
+        session.run("multiselect: pairs")
+
+    # The grid shortcut, starting from an empty comparison each time.
+    for _ in range(rounds):
+        session.widget("multiselect", "Coach and block").set_value([])
+        session.widget("multiselect", "Coaches").set_value(
+            rng.sample(engine.coaches, min(5, len(engine.coaches)))
+        )
+        session.widget("multiselect", "Blocks").set_value(
+            rng.sample(engine.blocks, rng.randint(1, len(engine.blocks)))
+        )
+        session.widget("button", "Add pairs").click()
+        session.run("button: add pairs")
+
+
+SCENARIOS = {
+    "app.py": home,
+    "pages/1_Individual_Coach_View.py": individual_coach_view,
+    "pages/2_Block_Average_View.py": block_average_view,
+    "pages/3_Coach_Comparison_View.py": coach_comparison_view
+}
+
+
+def _summary(samples: list) -> dict:
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(samples, 95)) * 1000, 2)
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure page rerun latency with AppTest.")
+    parser.add_argument("--coaches", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    excel_bytes = make_workbook(args.coaches, args.blocks, args.seed)
+    dataset = load_dataset(hash_bytes(excel_bytes), excel_bytes)
+    rng = random.Random(args.seed)
+
+    timings = defaultdict(lambda: defaultdict(list))
+
+    for page, scenario in SCENARIOS.items():
+        session = Session(page, timings, args.timeout)
+        session.login("synthetic.xlsx", excel_bytes)
+        scenario(session, dataset, rng, args.rounds)
+
+    report = {
+        "coaches": args.coaches,
+        "blocks": args.blocks,
+        "rows": len(dataset.scores),
+        "pages": {
+            page: {
+                "overall": _summary([t for samples in actions.values() for t in samples]),
+                "widgets": {action: _summary(samples) for action, samples in actions.items()}
+            }
+            for page, actions in timings.items()
+        }
+    }
+
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Synthetic CEF workbooks shaped like the real form export.
+
+Usage:
+    python -m benchmarks.workbook --coaches 500 --blocks 4 --output cef_500.xlsx
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+
+import openpyxl
+
+from constants import QUESTION_COLS
+
+ANSWERS = ["YES", "Neither YES or NO", "NO", None]
+ANSWER_WEIGHTS = [0.6, 0.25, 0.1, 0.05]
+
+NOISE_WORDS = (
+    "session players intensity feedback parents review training match "
+    "development plan support video game model pressing possession"
+).split()
+
+# Columns the real export carries that the dashboard never reads.
+HEADER = (
+    ["ID", "Start time", "Completion time", "Email", "Name", "Full Name "]
+    + QUESTION_COLS
+    + ["Any other comments?", "What support would help you most?"]
+)
+
+
+def _noise(rng: random.Random) -> str:
+    return " ".join(rng.choices(NOISE_WORDS, k=rng.randint(5, 80)))
+
+
+def make_workbook(coaches: int, blocks: int, seed: int = 0, skip_rate: float = 0.05) -> bytes:
+    """An xlsx with one response per coach per block, in block order.
+
+    Each coach misses a block with probability ``skip_rate``, and every row
+    carries free-text noise in the comment columns.
+    """
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Form1")
+    sheet.append(HEADER)
+
+    row_id = 0
+    start = datetime(2024, 8, 1, 9, 0)
+
+    for block in range(blocks):
+        block_start = start + timedelta(weeks=8 * block)
+
+        for coach in range(coaches):
+            if block and rng.random() < skip_rate:
+                continue
+
+            row_id += 1
+            opened = block_start + timedelta(minutes=rng.randint(0, 20000))
+            answers = rng.choices(ANSWERS, weights=ANSWER_WEIGHTS, k=len(QUESTION_COLS))
+
+            sheet.append(
+                [
+                    row_id,
+                    opened,
+                    opened + timedelta(minutes=rng.randint(5, 40)),
+                    f"coach{coach:05d}@example.com",
+                    f"Coach {coach:05d}",
+                    f"Coach {coach:05d}"
+                ]
+                + answers
+                + [_noise(rng), _noise(rng)]
+            )
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+
+    return buffer.getvalue()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic CEF workbook.")
+    parser.add_argument("--coaches", type=int, default=50)
+    parser.add_argument("--blocks", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    args.output.write_bytes(make_workbook(args.coaches, args.blocks, args.seed))
+
+
+if __name__ == "__main__":
+    main()
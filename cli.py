@@ -0,0 +1,66 @@
+"""Compute every CEF figure for a workbook without starting Streamlit.
+
+Usage:
+    python cli.py responses.xlsx --format csv --output results.csv
+
+Writes one row per coach and block with the group totals, CEF total,
+safeguarding scores and total, and the action-plan question lists, using the
+same ingestion and scoring code as the dashboard pages.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from data import hash_bytes, load_dataset
+
+FORMATS = ("json", "csv", "parquet")
+
+
+def write_results(df, path: Path, fmt: str) -> None:
+    if fmt == "json":
+        df.to_json(path, orient="records", indent=2, force_ascii=False)
+    elif fmt == "csv":
+        flat = df.copy()
+        for col in ("consider_improving", "immediate_attention"):
+            flat[col] = flat[col].str.join("; ")
+        flat.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workbook", type=Path, help="Excel export of the CEF form")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Output file (default: the workbook name with the format's extension)"
+    )
+    args = parser.parse_args(argv)
+
+    output = args.output or args.workbook.with_suffix(f".{args.format}")
+
+    started = time.perf_counter()
+    data = args.workbook.read_bytes()
+    dataset = load_dataset(hash_bytes(data), data)
+    loaded = time.perf_counter()
+    results = dataset.engine.results()
+    scored = time.perf_counter()
+
+    write_results(results, output, args.format)
+
+    print(
+        f"{len(results)} responses from {len(dataset.engine.coaches)} coaches "
+        f"across {len(dataset.engine.blocks)} blocks -> {output}\n"
+        f"load {loaded - started:.3f}s, score {scored - loaded:.3f}s",
+        file=sys.stderr
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Score colour bands shared by the on-screen tiles and the PDF reports."""
+
+
+def get_group_colour(score):
+    if score >= 3.51:
+        return "#4CAF50"
+    elif score >= 2.51:
+        return "#FFD966"
+    elif score >= 1.51:
+        return "#F4A261"
+    else:
+        return "#FF6B6B"
+
+
+def get_safeguarding_colour(score):
+    if score == 1:
+        return "#4CAF50"
+    elif score == 0.5:
+        return "#F4A261"
+    else:
+        return "#FF6B6B"
+
+
+def get_average_safeguarding_colour(score):
+    """Bands for block averages, which fall between the 0 / 0.5 / 1 answers."""
+    if score >= 0.8:
+        return "#4CAF50"
+    elif score >= 0.5:
+        return "#F4A261"
+    else:
+        return "#FF6B6B"
+
+
+def get_cef_total_colour(score):
+    """Bands for a whole CEF score out of 36."""
+    if score >= 29:
+        return "#4CAF50"
+    elif score >= 22:
+        return "#FFD966"
+    elif score >= 14:
+        return "#F4A261"
+    else:
+        return "#FF6B6B"
@@ -0,0 +1,167 @@
+"""HTML building blocks rendered by the dashboard pages."""
+
+import math
+from functools import lru_cache
+from html import escape
+
+import numpy as np
+
+from colours import get_group_colour, get_safeguarding_colour
+from constants import GROUP_LABELS, QUESTIONS_PER_GROUP, SAFEGUARDING_QUESTIONS
+
+# Tile sections are cached by their inputs, so reruns with the same scores
+# reuse the markup.
+TILE_CACHE_SIZE = 1024
+
+# Tiles for one section are sent as a single element; question details open
+# in the browser with <details> instead of a popover widget per tile.
+TILE_CSS = """
+<style>
+.cef-tiles { display:grid; gap:1rem; margin-bottom:1rem; }
+.cef-tiles.groups { grid-template-columns:repeat(3, minmax(0, 1fr)); }
+.cef-tiles.safeguarding { grid-template-columns:repeat(5, minmax(0, 1fr)); }
+.cef-tile { padding:18px; border-radius:10px; text-align:center; margin-bottom:10px; box-shadow:0 4px 10px rgba(0,0,0,0.15); }
+.cef-tiles.safeguarding .cef-tile { padding:16px; border-radius:12px; height:130px; margin-bottom:0; }
+.cef-tile .score { font-size:26px; font-weight:bold; }
+.cef-tile .label { font-size:12px; }
+.cef-tiles.safeguarding .label { font-size:11px; margin-top:6px; }
+.cef-tiles details { border:1px solid #E0E0E0; border-radius:8px; padding:6px 10px; }
+.cef-tiles summary { cursor:pointer; text-align:center; }
+.cef-tiles details ul { margin:8px 0 0 0; padding-left:1.2rem; }
+</style>
+"""
+
+# The group column stays put while long block histories scroll sideways.
+COMPARISON_TABLE_CSS = """
+<style>
+.cef-compare { overflow-x:auto; }
+.cef-compare table { width:100%; border-collapse:collapse; text-align:center; }
+.cef-compare th, .cef-compare td { padding:8px; white-space:nowrap; }
+.cef-compare tr > :first-child { position:sticky; left:0; z-index:1; background-color:#FFFFFF; font-weight:bold; box-shadow:2px 0 4px rgba(0,0,0,0.08); }
+.cef-compare td.up { background-color:#4CAF50; color:white; }
+.cef-compare td.down { background-color:#FF6B6B; color:white; }
+.cef-compare td.question { white-space:normal; min-width:240px; text-align:left; font-weight:normal; }
+.cef-compare tr.total td { font-weight:bold; border-top:2px solid #E0E0E0; }
+</style>
+"""
+
+
+def comparison_table_html(blocks, totals) -> str:
+    """Group-by-block table, shading each cell up or down from the block before.
+
+    ``totals`` is the (group, block) matrix of the coach's group totals, with
+    columns in the order of ``blocks``.
+    """
+    values = np.round(np.asarray(totals, dtype=np.float64), 1)
+
+    diffs = np.diff(values, axis=1)
+    classes = np.full(values.shape, "", dtype=object)
+    classes[:, 1:] = np.where(diffs > 0, " class='up'", np.where(diffs < 0, " class='down'", ""))
+
+    header = "".join(f"<th>{block}</th>" for block in blocks)
+    rows = "".join(
+        f"<tr><td>{label}</td>"
+        + "".join(f"<td{cls}>{val}</td>" for cls, val in zip(row_classes, row_values))
+        + "</tr>"
+        for label, row_classes, row_values in zip(
+            GROUP_LABELS, classes.tolist(), values.tolist()
+        )
+    )
+
+    return (
+        f"{COMPARISON_TABLE_CSS}<div class='cef-compare'><table>"
+        f"<tr><th>Group</th>{header}</tr>{rows}</table></div>"
+    )
+
+
+def comparison_matrix_html(pairs, group_totals, cef_totals, safeguarding, safeguarding_totals) -> str:
+    """Scores for many (coach, block) pairs as one table, a column per pair.
+
+    The arrays are those returned by ``ScoreEngine.pair_scores``, with one
+    row per pair. Cells use the same colour bands as the score tiles.
+    """
+    header = "".join(f"<th>{coach}<br>{block}</th>" for coach, block in pairs)
+
+    def row(label, values, colour=None, css=""):
+        cells = "".join(
+            f"<td style='background-color:{colour(v)};'>{v}</td>" if colour else f"<td>{v}</td>"
+            for v in values
+        )
+        return f"<tr class='{css}'><td class='question'>{label}</td>{cells}</tr>"
+
+    rows = [row("CEF Score / 36", cef_totals.tolist(), css="total")]
+    rows += [
+        row(label, values, get_group_colour)
+        for label, values in zip(GROUP_LABELS, group_totals.T.tolist())
+    ]
+    rows.append(row("Safeguarding Score / 5", safeguarding_totals.tolist(), css="total"))
+    rows += [
+        row(question, values, get_safeguarding_colour)
+        for question, values in zip(SAFEGUARDING_QUESTIONS, safeguarding.T.tolist())
+    ]
+
+    return (
+        f"{COMPARISON_TABLE_CSS}<div class='cef-compare'><table>"
+        f"<tr><th></th>{header}</tr>{''.join(rows)}</table></div>"
+    )
+
+
+def _cache_key(scores) -> tuple:
+    # NaN never equals itself, so use one shared NaN to let cached entries match.
+    return tuple(math.nan if score != score else score for score in scores)
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _group_grid_html(group_totals: tuple, answers: tuple, colour) -> str:
+    cells = []
+
+    for idx, (label, score) in enumerate(zip(GROUP_LABELS, group_totals)):
+        cell = (
+            f"<div class='cef-tile' style='background-color:{colour(score)};'>"
+            f"<div class='score'>{score}</div><div class='label'>{label}</div></div>"
+        )
+
+        if answers:
+            group_answers = answers[idx * QUESTIONS_PER_GROUP:(idx + 1) * QUESTIONS_PER_GROUP]
+            items = "".join(
+                f"<li><b>Question:</b> {escape(question)}<br>"
+                f"<b>Coach answer:</b> {escape(answer)}</li>"
+                for question, answer in group_answers
+            )
+            cell += (
+                f"<details><summary>View questions for {label}</summary>"
+                f"<p><b>{label}</b></p><ul>{items}</ul></details>"
+            )
+
+        cells.append(f"<div>{cell}</div>")
+
+    return f"{TILE_CSS}<div class='cef-tiles groups'>{''.join(cells)}</div>"
+
+
+def group_grid_html(group_totals, answers=None, colour=get_group_colour) -> str:
+    """The nine group tiles as one element.
+
+    ``answers`` is an optional list of (question, answer) pairs in question
+    order; each tile then gets an expandable list of its group's questions.
+    """
+    return _group_grid_html(
+        _cache_key(group_totals),
+        tuple((question, str(answer)) for question, answer in answers or ()),
+        colour
+    )
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _safeguarding_row_html(scores: tuple, colour) -> str:
+    cells = "".join(
+        f"<div class='cef-tile' style='background-color:{colour(score)};'>"
+        f"<div class='score'>{score}</div><div class='label'>{question}</div></div>"
+        for question, score in zip(SAFEGUARDING_QUESTIONS, scores)
+    )
+
+    return f"{TILE_CSS}<div class='cef-tiles safeguarding'>{cells}</div>"
+
+
+def safeguarding_row_html(scores, colour=get_safeguarding_colour) -> str:
+    """The five safeguarding tiles as one element."""
+    return _safeguarding_row_html(_cache_key(scores), colour)
@@ -0,0 +1,582 @@
+"""Shared ingestion of the uploaded CEF workbook.
+
+Each upload is parsed at most once per content hash, snapshotted to a
+memory-mapped Arrow file, and served to every session from one
+process-wide store.
+"""
+
+import hashlib
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import metrics
+from constants import MISSING_CODE, QUESTION_COLS, SCORE_MAP, SCORE_SCALE, TIMESTAMP_COLS
+from profiling import phase, timed_import
+from scoring import ScoreEngine
+
+SCORE_CODES = {answer: int(score * SCORE_SCALE) for answer, score in SCORE_MAP.items()}
+
+# Memory budget for the store; datasets a session still holds are never evicted.
+MAX_DATASET_BYTES = int(os.environ.get("CEF_DATASET_MEMORY_MB", "1024")) * 1024 * 1024
+
+CACHE_DIR = Path(
+    os.environ.get("CEF_CACHE_DIR", Path(__file__).resolve().parent / ".cache")
+)
+
+# Disk budget for snapshots; those of datasets in the store are never deleted.
+MAX_SNAPSHOT_BYTES = int(os.environ.get("CEF_SNAPSHOT_MB", "2048")) * 1024 * 1024
+
+# Temporary files older than this were left by an interrupted write.
+STALE_TMP_SECONDS = 60 * 60
+
+# Workbooks at least this large are read with calamine when it is available.
+CALAMINE_MIN_BYTES = 512 * 1024
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Normalized survey responses for one uploaded workbook.
+
+    The frames are shared between sessions and must not be modified in place.
+    ``scores`` and ``raw`` share row order, so ``row_index`` (keyed by coach and
+    block) and ``block_rows`` (positions of each block's rows in file order)
+    index both of them. ``raw`` is read on first use through ``load_raw``.
+    """
+
+    content_hash: str
+    scores: pd.DataFrame
+    question_cols: list
+    row_index: dict
+    block_rows: dict
+    load_raw: object = field(repr=False, compare=False)
+
+    @property
+    def block_names(self) -> list:
+        return list(self.block_rows)
+
+    def block_coaches(self, block) -> list:
+        """Coaches with a response in the block, in workbook order."""
+        return self.scores["Full Name"].iloc[self.block_rows[block]].tolist()
+
+    @cached_property
+    def raw(self) -> pd.DataFrame:
+        """Answers as submitted, plus any timestamp columns."""
+        with phase("raw answers load"):
+            return self.load_raw()
+
+    def raw_answers(self, coach, block) -> pd.Series:
+        """Answers as submitted, for the question details."""
+        return self.raw.iloc[self.row_index[(coach, block)]]
+
+    @cached_property
+    def engine(self) -> ScoreEngine:
+        """Score tensor for this dataset, built on first use."""
+        with phase("scoring"):
+            return ScoreEngine(self.scores, self.question_cols)
+
+    def memory_report(self) -> dict:
+        """Approximate bytes held by each part of the dataset.
+
+        ``raw`` is None until the raw answers have been loaded. ``engine`` is
+        estimated until the score tensor has been built.
+        """
+        if "engine" in self.__dict__:
+            engine = sum(
+                value.nbytes for value in vars(self.engine).values()
+                if isinstance(value, np.ndarray)
+            )
+        else:
+            # The float64 score tensor: 8 bytes a cell.
+            engine = (
+                len(self.scores["Full Name"].cat.categories)
+                * len(self.block_rows)
+                * len(self.question_cols)
+                * 8
+            )
+
+        return {
+            "scores": int(self.scores.memory_usage(deep=True).sum()),
+            "raw": (
+                int(self.raw.memory_usage(deep=True).sum())
+                if "raw" in self.__dict__ else None
+            ),
+            "engine": engine
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(v for v in self.memory_report().values() if v is not None)
+
+
+_datasets = OrderedDict()
+_refcounts = {}
+_datasets_lock = threading.Lock()
+
+# Hashes whose handles were collected, applied the next time the lock is held.
+# The finalizer can run on any thread mid-allocation, including one already
+# holding _datasets_lock, so it only appends here.
+_pending_releases = deque()
+
+# Content hash -> [lock, users], so each workbook is parsed by one session only.
+_ingest_locks = {}
+_ingest_locks_lock = threading.Lock()
+
+
+def hash_bytes(data: bytes) -> str:
+    """Content hash used to key everything derived from an upload."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def snapshot_paths(content_hash: str) -> tuple:
+    """Locations of the raw-answer and score snapshots for a workbook."""
+    return (
+        CACHE_DIR / f"{content_hash}.raw.arrow",
+        CACHE_DIR / f"{content_hash}.scores.arrow"
+    )
+
+
+def _as_category(values: pd.Series) -> pa.DictionaryArray:
+    """Dictionary-encoded strings with a sorted dictionary, read back as a categorical."""
+    categorical = pd.Categorical(
+        [None if pd.isna(v) else str(v) for v in values]
+    )
+
+    return pa.DictionaryArray.from_arrays(
+        pa.array(categorical.codes, mask=categorical.codes < 0),
+        pa.array(categorical.categories, type=pa.string())
+    )
+
+
+def _write_table(table: pa.Table, path: Path) -> None:
+    """Write an uncompressed Arrow file atomically so it can be memory-mapped."""
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as tmp:
+        tmp_path = Path(tmp.name)
+
+    try:
+        with ipc.new_file(str(tmp_path), table.schema) as writer:
+            writer.write_table(table)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _read_table(path: Path) -> pd.DataFrame:
+    """Memory-map an Arrow snapshot; numeric columns stay backed by the map."""
+    with pa.memory_map(str(path)) as source:
+        table = ipc.open_file(source).read_all()
+
+    return table.to_pandas(split_blocks=True)
+
+
+def _check_table(path: Path) -> None:
+    """Raise if an Arrow snapshot is truncated, without reading its data."""
+    with pa.memory_map(str(path)) as source:
+        ipc.open_file(source)
+
+
+def prune_snapshots(keep=()) -> None:
+    """Delete the least recently used snapshots until they fit MAX_SNAPSHOT_BYTES.
+
+    Snapshots of datasets in the store or pinned by a handle, and of the
+    hashes in ``keep``, are never deleted. Loading a snapshot marks it used.
+    """
+    with _datasets_lock:
+        keep = set(keep) | set(_datasets) | set(_refcounts)
+
+    try:
+        paths = list(CACHE_DIR.iterdir())
+    except OSError:
+        return
+
+    now = time.time()
+    snapshots = {}
+
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+
+        if path.name.endswith(".tmp"):
+            if now - stat.st_mtime > STALE_TMP_SECONDS:
+                path.unlink(missing_ok=True)
+        elif path.name.endswith(".arrow"):
+            entry = snapshots.setdefault(path.name.split(".")[0], [0, 0.0, []])
+            entry[0] += stat.st_size
+            entry[1] = max(entry[1], stat.st_mtime)
+            entry[2].append(path)
+
+    total = sum(size for size, _, _ in snapshots.values())
+
+    for content_hash, (size, _, files) in sorted(snapshots.items(), key=lambda item: item[1][1]):
+        if total <= MAX_SNAPSHOT_BYTES:
+            break
+
+        if content_hash in keep:
+            continue
+
+        for path in files:
+            path.unlink(missing_ok=True)
+
+        total -= size
+
+
+def _strip_header(header) -> list:
+    return ["" if name is None else str(name).strip() for name in header]
+
+
+def resolve_columns(header: list) -> dict:
+    """Map the header positions worth reading to their stripped names.
+
+    Keeps "Full Name", the known survey questions and the form's timestamp
+    columns; free-text columns the scoring never uses are left unread.
+    """
+    wanted = {}
+
+    for idx, name in enumerate(header):
+        if name in wanted.values():
+            continue
+
+        if name == "Full Name" or name in QUESTION_COLS or name in TIMESTAMP_COLS:
+            wanted[idx] = name
+
+    if "Full Name" not in wanted.values():
+        raise ValueError('The workbook has no "Full Name" column.')
+
+    return wanted
+
+
+def select_engine(size: int) -> str:
+    """Pick the Excel reader for a workbook of the given size in bytes."""
+    if size >= CALAMINE_MIN_BYTES and importlib.util.find_spec("python_calamine"):
+        return "calamine"
+
+    return "openpyxl"
+
+
+def _read_openpyxl(data: bytes) -> pd.DataFrame:
+    """Stream the wanted columns row by row from a read-only workbook."""
+    # Only needed to parse an upload; snapshot loads never touch it.
+    with timed_import("openpyxl"):
+        import openpyxl
+
+    workbook = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+
+    try:
+        sheet = workbook.worksheets[0]
+
+        # Read-only sheets trust the stored <dimension> tag, which some
+        # writers leave stale; pandas resets it for the same reason.
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        with phase("header strip"):
+            columns = resolve_columns(_strip_header(next(rows, ())))
+        positions = list(columns)
+
+        records = [
+            [row[idx] if idx < len(row) else None for idx in positions]
+            for row in rows
+        ]
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(records, columns=list(columns.values()))
+
+
+def _read_calamine(data: bytes) -> pd.DataFrame:
+    """Read the header, then only the wanted columns, with calamine."""
+    with phase("header strip"):
+        header = pd.read_excel(BytesIO(data), engine="calamine", nrows=0).columns
+        columns = resolve_columns(_strip_header(header))
+
+    df = pd.read_excel(BytesIO(data), engine="calamine", usecols=list(columns))
+    df.columns = list(columns.values())
+
+    return df
+
+
+def read_workbook(data: bytes) -> pd.DataFrame:
+    """Read only the columns the dashboard uses, with stripped headers."""
+    with phase("Excel read"):
+        if select_engine(len(data)) == "calamine":
+            return _read_calamine(data)
+
+        return _read_openpyxl(data)
+
+
+def assign_blocks(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Number each coach's responses in workbook order as Block 1, Block 2, ..."""
+    raw_df = raw_df[raw_df["Full Name"].notna()].reset_index(drop=True)
+    raw_df["Block_Number"] = raw_df.groupby("Full Name").cumcount() + 1
+    raw_df["Block_Name"] = "Block " + raw_df["Block_Number"].astype(str)
+
+    return raw_df
+
+
+def map_scores(raw_df: pd.DataFrame, question_cols: list) -> dict:
+    """int8 score codes for each question, MISSING_CODE for blank or unknown answers."""
+    return {
+        col: raw_df[col].map(SCORE_CODES).fillna(MISSING_CODE).to_numpy(dtype=np.int8)
+        for col in question_cols
+    }
+
+
+def build_tables(raw_df: pd.DataFrame, scores: dict) -> tuple:
+    """Raw-answer and score Arrow tables for a block-assigned response frame.
+
+    Coach and block live only in the score table; the raw table holds just
+    the answer text and timestamps for display.
+    """
+    question_cols = list(scores)
+
+    timestamp_cols = [c for c in raw_df.columns if c in TIMESTAMP_COLS]
+
+    raw_table = pa.table({
+        **{
+            col: pa.array(pd.to_datetime(raw_df[col], errors="coerce"))
+            for col in timestamp_cols
+        },
+        **{col: _as_category(raw_df[col]) for col in question_cols}
+    })
+
+    # The int8 codes have no nulls, so they convert back to pandas without copying.
+    scores_table = pa.table({
+        "Full Name": _as_category(raw_df["Full Name"]),
+        "Block_Number": pa.array(raw_df["Block_Number"].to_numpy(), type=pa.int16()),
+        "Block_Name": _as_category(raw_df["Block_Name"]),
+        **{col: pa.array(codes) for col, codes in scores.items()}
+    })
+
+    return raw_table, scores_table
+
+
+def parse_workbook(data: bytes) -> tuple:
+    """Parse and normalize a workbook: strip headers, assign blocks, map scores.
+
+    Returns the raw-answer and score tables ready to be snapshotted.
+    """
+    raw_df = read_workbook(data)
+
+    with phase("block assignment"):
+        raw_df = assign_blocks(raw_df)
+
+    question_cols = [c for c in raw_df.columns if c in QUESTION_COLS]
+
+    with phase("score mapping"):
+        return build_tables(raw_df, map_scores(raw_df, question_cols))
+
+
+def build_dataset(content_hash: str, df: pd.DataFrame, load_raw) -> Dataset:
+    """Assemble a dataset from its score frame and a loader for the raw answers."""
+    question_cols = [c for c in df.columns if c in QUESTION_COLS]
+
+    block_rows = dict(sorted(
+        df.groupby("Block_Name", sort=False, observed=True).indices.items()
+    ))
+    row_index = {
+        key: pos
+        for pos, key in enumerate(zip(df["Full Name"], df["Block_Name"]))
+    }
+
+    return Dataset(
+        content_hash=content_hash,
+        scores=df,
+        question_cols=question_cols,
+        row_index=row_index,
+        block_rows=block_rows,
+        load_raw=load_raw
+    )
+
+
+def load_snapshot(content_hash: str):
+    """Memory-map a previously written snapshot, or None if there isn't one."""
+    raw_path, scores_path = snapshot_paths(content_hash)
+
+    if not (raw_path.exists() and scores_path.exists()):
+        return None
+
+    try:
+        with phase("snapshot load"):
+            scores = _read_table(scores_path)
+            _check_table(raw_path)
+
+        for path in (raw_path, scores_path):
+            os.utime(path)
+    except (OSError, pa.ArrowException):
+        # A damaged snapshot is dropped so the workbook is parsed again.
+        raw_path.unlink(missing_ok=True)
+        scores_path.unlink(missing_ok=True)
+        return None
+
+    return build_dataset(content_hash, scores, lambda: _read_table(raw_path))
+
+
+def _ingest(content_hash: str, data: bytes) -> Dataset:
+    dataset = load_snapshot(content_hash)
+    if dataset is not None:
+        return dataset
+
+    raw_table, scores_table = parse_workbook(data)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        raw_path, scores_path = snapshot_paths(content_hash)
+        with phase("snapshot write"):
+            _write_table(raw_table, raw_path)
+            _write_table(scores_table, scores_path)
+        prune_snapshots(keep=[content_hash])
+    except OSError:
+        pass
+    else:
+        dataset = load_snapshot(content_hash)
+        if dataset is not None:
+            return dataset
+
+    # Without a usable cache directory the dataset simply lives in memory.
+    return build_dataset(
+        content_hash,
+        scores_table.to_pandas(split_blocks=True),
+        raw_table.to_pandas
+    )
+
+
+def _drain_releases() -> None:
+    """Unpin the datasets of collected handles. Call with ``_datasets_lock`` held."""
+    while _pending_releases:
+        content_hash = _pending_releases.popleft()
+        _refcounts[content_hash] -= 1
+
+        if not _refcounts[content_hash]:
+            del _refcounts[content_hash]
+
+
+def _evict() -> None:
+    """Drop unpinned datasets, oldest first, until the store fits its budget.
+
+    Call with ``_datasets_lock`` held.
+    """
+    _drain_releases()
+
+    total = sum(dataset.nbytes for dataset in _datasets.values())
+
+    for content_hash in list(_datasets):
+        if total <= MAX_DATASET_BYTES:
+            break
+
+        if _refcounts.get(content_hash):
+            continue
+
+        total -= _datasets.pop(content_hash).nbytes
+        metrics.inc("cef_dataset_cache_evictions_total")
+
+    metrics.set_gauge("cef_dataset_cache_entries", len(_datasets))
+    metrics.set_gauge("cef_dataset_cache_bytes", total)
+
+
+@contextmanager
+def _ingest_lock(content_hash: str):
+    """Let one thread at a time load a given workbook into the store."""
+    with _ingest_locks_lock:
+        entry = _ingest_locks.setdefault(content_hash, [threading.Lock(), 0])
+        entry[1] += 1
+
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _ingest_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _ingest_locks[content_hash]
+
+
+def _cached(content_hash: str):
+    with _datasets_lock:
+        _drain_releases()
+
+        dataset = _datasets.get(content_hash)
+        if dataset is not None:
+            _datasets.move_to_end(content_hash)
+            metrics.inc("cef_dataset_cache_hits_total")
+
+        return dataset
+
+
+def load_dataset(content_hash: str, data: bytes = None):
+    """Return the normalized dataset for an upload, parsing it on first use only.
+
+    Without ``data`` only the store and the snapshots are consulted, and None
+    is returned if neither has the dataset.
+    """
+    dataset = _cached(content_hash)
+    if dataset is not None:
+        return dataset
+
+    with _ingest_lock(content_hash):
+        # Another session may have loaded it while this one waited.
+        dataset = _cached(content_hash)
+        if dataset is not None:
+            return dataset
+
+        metrics.inc("cef_dataset_cache_misses_total")
+
+        if data is None:
+            dataset = load_snapshot(content_hash)
+            if dataset is None:
+                return None
+        else:
+            dataset = _ingest(content_hash, data)
+
+        with _datasets_lock:
+            _datasets[content_hash] = dataset
+            _evict()
+
+    return dataset
+
+
+class DatasetHandle:
+    """A session's claim on a dataset in the shared store.
+
+    This is all a session keeps in ``st.session_state``. The dataset stays
+    pinned while the handle is alive; replacing the handle with a new upload,
+    or the session going away, releases it the next time the store is used.
+    """
+
+    def __init__(self, content_hash: str):
+        self.content_hash = content_hash
+
+        with _datasets_lock:
+            _refcounts[content_hash] = _refcounts.get(content_hash, 0) + 1
+
+        weakref.finalize(self, _pending_releases.append, content_hash)
+
+    def get(self):
+        """The dataset, reloaded from its snapshot if it is no longer in memory."""
+        return load_dataset(self.content_hash)
+
+
+def acquire_dataset(content_hash: str, data: bytes) -> DatasetHandle:
+    """Load an upload into the shared store and return a handle pinning it."""
+    handle = DatasetHandle(content_hash)
+    load_dataset(content_hash, data)
+
+    return handle
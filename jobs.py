@@ -0,0 +1,194 @@
+"""Report builds that run off the script thread.
+
+A ReportLab build on the script thread freezes the page until it finishes.
+Builds are submitted here instead, to a small thread pool shared by every
+session, and the page polls the job until it can offer the download. Jobs are
+keyed by what they build, so repeated clicks, or two sessions asking for the
+same report, share one build. Bulk exports still fan out to the report
+module's process pool from their job thread.
+
+A job still running after ``JOB_DEADLINE_SECONDS`` is treated as failed, so
+a hung build does not hold its key forever: the page shows the error and
+the next click starts a new build.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+
+import metrics
+from profiling import active
+
+JOB_WORKERS = int(os.environ.get("CEF_REPORT_JOB_WORKERS", 2))
+
+# Counted from submission, so time spent queued behind other jobs counts too.
+JOB_DEADLINE_SECONDS = int(os.environ.get("CEF_REPORT_JOB_DEADLINE", 15 * 60))
+
+# Finished jobs are kept so their result can still be downloaded.
+FINISHED_JOBS = 16
+
+# How often a page checks on a running job.
+POLL_SECONDS = 1.0
+
+# Builds that finish this quickly go straight to the download.
+QUICK_SECONDS = 0.25
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+_executor = None
+
+
+class Job:
+    """One background build and how far it has got."""
+
+    def __init__(self, key, kind: str):
+        self.key = key
+        self.kind = kind
+        self.done = 0
+        self.total = 0
+        self.future = None
+        self.started = time.monotonic()
+
+    def progress(self, done: int, total: int) -> None:
+        self.done = done
+        self.total = total
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+    def running(self) -> bool:
+        return not self.future.done() and not self.stale()
+
+    def stale(self) -> bool:
+        """Still running past the deadline; the build is presumed hung."""
+        return not self.future.done() and time.monotonic() - self.started > JOB_DEADLINE_SECONDS
+
+    @property
+    def error(self):
+        if self.stale():
+            return TimeoutError(f"still running after {JOB_DEADLINE_SECONDS} seconds")
+
+        return self.future.exception() if self.future.done() else None
+
+    def result(self):
+        return self.future.result()
+
+
+def _job_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="report-job")
+
+    return _executor
+
+
+def _running_jobs() -> int:
+    return sum(job.running() for job in _jobs.values())
+
+
+def _finished(future) -> None:
+    with _jobs_lock:
+        metrics.set_gauge("cef_report_jobs_running", _running_jobs())
+
+
+def find_job(key):
+    """The job for ``key``, running or finished, or None."""
+    with _jobs_lock:
+        return _jobs.get(key)
+
+
+def submit_job(key, kind: str, build) -> Job:
+    """Run ``build(progress)`` in the background and return its job.
+
+    If a job for ``key`` is already running, or finished successfully, that
+    job is returned instead. A failed or stale job is replaced.
+    ``progress`` takes (done, total).
+    """
+    with _jobs_lock:
+        job = _jobs.get(key)
+
+        if job is not None and job.error is None:
+            _jobs.move_to_end(key)
+            metrics.inc("cef_report_jobs_reused_total", kind=kind)
+            return job
+
+        if job is not None:
+            # Drops a stale job that never got a worker; a hung one runs on.
+            job.future.cancel()
+
+        job = Job(key, kind)
+        run = lambda: build(job.progress)
+
+        # A profiled rerun gets the build logged as its own record.
+        profile = active()
+        job.future = _job_executor().submit(profile.timed(f"{kind} job", run) if profile else run)
+        _jobs[key] = job
+
+        finished = [k for k, j in _jobs.items() if not j.running()]
+        for old_key in finished[:max(0, len(finished) - FINISHED_JOBS)]:
+            del _jobs[old_key]
+
+        metrics.inc("cef_report_jobs_started_total", kind=kind)
+        metrics.set_gauge("cef_report_jobs_running", _running_jobs())
+
+    job.future.add_done_callback(_finished)
+
+    return job
+
+
+# ===================== PAGE HELPERS =====================
+
+@st.fragment(run_every=POLL_SECONDS)
+def _job_status(key) -> None:
+    """Progress of a running job, refreshed until it finishes."""
+    job = find_job(key)
+
+    if job is None or not job.running():
+        # Rerun the page so the caller swaps this for the download.
+        st.rerun()
+        return
+
+    if job.total > 1:
+        st.progress(job.fraction, text=f"Building {job.kind}: {job.done} of {job.total}")
+    else:
+        st.progress(job.fraction, text=f"Building {job.kind}...")
+
+
+def job_panel(key, kind: str, build, build_label: str, download_label: str, file_name: str, mime: str) -> None:
+    """A build button, then the job's progress, then its download.
+
+    Call from inside a fragment: clicking the button reruns that fragment,
+    which submits the job and switches to the status display. The page is
+    never blocked while the job runs.
+    """
+    job = find_job(key)
+
+    if job is not None and job.error is not None:
+        st.error(f"Building the {kind} failed: {job.error}")
+        job = None
+
+    if job is None:
+        if not st.button(build_label, key=f"build {kind}"):
+            return
+
+        job = submit_job(key, kind, build)
+        wait([job.future], timeout=QUICK_SECONDS)
+
+    if job.running():
+        _job_status(key)
+        return
+
+    st.download_button(
+        label=download_label,
+        data=job.result(),
+        file_name=file_name,
+        mime=mime,
+        on_click="ignore"
+    )
@@ -0,0 +1,242 @@
+"""Process-wide counters exported in Prometheus text format.
+
+Counts reruns per page, dataset and PDF cache hits, misses and evictions,
+background report jobs, the bytes each browser session holds in
+``st.session_state``, and how long each lazily imported library took to load. The metrics are
+exposed in one or both of these ways:
+
+- ``CEF_METRICS_PORT``: serve ``/metrics`` over HTTP on 127.0.0.1 at that port.
+- ``CEF_METRICS_FILE``: rewrite that file (for node_exporter's textfile
+  collector) at most every ``TEXTFILE_INTERVAL`` seconds.
+
+With neither set, counting still happens but nothing is exported. Streamlit
+is only imported by ``record_rerun``, so the data and report modules can
+count without it.
+"""
+
+import numbers
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+METRICS = {
+    "cef_page_reruns_total": ("counter", "Script reruns per page."),
+    "cef_fragment_reruns_total": ("counter", "Reruns of a single page fragment."),
+    "cef_dataset_cache_hits_total": ("counter", "Datasets served from the in-process cache."),
+    "cef_dataset_cache_misses_total": ("counter", "Datasets loaded from a snapshot or parsed from Excel."),
+    "cef_dataset_cache_evictions_total": ("counter", "Datasets dropped from the in-process cache."),
+    "cef_dataset_cache_entries": ("gauge", "Datasets currently held in the in-process cache."),
+    "cef_dataset_cache_bytes": ("gauge", "Approximate bytes held by the in-process dataset cache."),
+    "cef_pdf_cache_hits_total": ("counter", "PDF reports served from cache."),
+    "cef_pdf_cache_misses_total": ("counter", "PDF reports built."),
+    "cef_sessions_active": ("gauge", "Sessions that reran within the last SESSION_TTL seconds."),
+    "cef_session_bytes_sum": ("gauge", "Approximate session state bytes across active sessions."),
+    "cef_session_bytes_max": ("gauge", "Approximate session state bytes of the largest active session."),
+    "cef_import_seconds": ("gauge", "Seconds spent on the first import of a lazily loaded library."),
+    "cef_report_jobs_started_total": ("counter", "Background report builds started."),
+    "cef_report_jobs_reused_total": ("counter", "Report requests served by a running or finished build."),
+    "cef_report_jobs_running": ("gauge", "Background report builds in progress."),
+    "cef_report_pool_restarts_total": ("counter", "Bulk export process pools replaced after a worker died or hung.")
+}
+
+# Sessions that have not rerun for this long no longer count as active.
+SESSION_TTL = 30 * 60
+
+TEXTFILE_INTERVAL = 10
+
+# Unlabelled metrics start at zero so they are exported before the first event.
+_values = {
+    (name, ()): 0
+    for name in METRICS
+    if name not in (
+        "cef_page_reruns_total",
+        "cef_fragment_reruns_total",
+        "cef_import_seconds",
+        "cef_report_jobs_started_total",
+        "cef_report_jobs_reused_total"
+    )
+}
+_sessions = {}
+_lock = threading.Lock()
+
+_server = None
+_textfile_written = 0.0
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    key = (name, tuple(sorted(labels.items())))
+
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _values[(name, tuple(sorted(labels.items())))] = value
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value) -> str:
+    # Integers are exact; ":g" would round large counters to six digits.
+    if isinstance(value, numbers.Integral) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+
+    return repr(float(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    now = time.monotonic()
+
+    with _lock:
+        for session_id in [
+            s for s, (seen, _) in _sessions.items() if now - seen > SESSION_TTL
+        ]:
+            del _sessions[session_id]
+
+        sizes = [size for _, size in _sessions.values()]
+        _values[("cef_sessions_active", ())] = len(sizes)
+        _values[("cef_session_bytes_sum", ())] = sum(sizes)
+        _values[("cef_session_bytes_max", ())] = max(sizes, default=0)
+
+        values = dict(_values)
+
+    lines = []
+
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        samples = sorted(
+            (labels, value) for (n, labels), value in values.items() if n == name
+        )
+
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ===================== EXPORT =====================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int) -> None:
+    """Serve /metrics on localhost from a daemon thread, once per process."""
+    global _server
+
+    with _lock:
+        if _server is not None:
+            return
+
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        except OSError:
+            # Another process (or a previous server) already owns the port.
+            _server = False
+            return
+
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+
+def write_textfile(path: Path) -> None:
+    """Atomically rewrite the textfile, at most every TEXTFILE_INTERVAL seconds."""
+    global _textfile_written
+
+    now = time.monotonic()
+
+    with _lock:
+        if now - _textfile_written < TEXTFILE_INTERVAL:
+            return
+        _textfile_written = now
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def export() -> None:
+    port = os.environ.get("CEF_METRICS_PORT")
+    if port:
+        start_http_server(int(port))
+
+    textfile = os.environ.get("CEF_METRICS_FILE")
+    if textfile:
+        write_textfile(Path(textfile))
+
+
+# ===================== PAGE HELPERS =====================
+
+def _size_of(value) -> int:
+    """Rough in-memory size of a session value, counting payload bytes."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(_size_of(v) for v in value)
+
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size_of(v) for v in value.values())
+
+    return sys.getsizeof(value)
+
+
+def record_rerun(page: str) -> None:
+    """Count a rerun of the page and note how much state its session holds."""
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    inc("cef_page_reruns_total", page=page)
+
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        size = sum(_size_of(st.session_state[key]) for key in st.session_state)
+
+        with _lock:
+            _sessions[ctx.session_id] = (time.monotonic(), size)
+
+    export()
+
+
+def record_fragment_rerun(page: str, fragment: str) -> None:
+    """Count a rerun of just this fragment; full page reruns are not counted."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not ctx.fragment_ids_this_run:
+        return
+
+    inc("cef_fragment_reruns_total", page=page, fragment=fragment)
+    export()
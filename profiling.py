@@ -0,0 +1,337 @@
+"""Opt-in per-rerun phase timings.
+
+Set ``CEF_PROFILE=1`` in the environment, or open a page with ``?profile=1``,
+to get a collapsible panel breaking the current rerun down into phases (Excel
+read, header strip, score mapping, block assignment, scoring, HTML rendering,
+PDF build) with the wall time of each. Every profiled rerun is also appended
+to a JSONL log (``CEF_PROFILE_LOG``).
+
+Library code marks phases with ``phase(name)``, which costs nothing unless a
+profile is active on the current thread. Streamlit is only imported by the
+page helpers, so the CLI and benchmarks can use this module without it.
+Peak memory per phase is only recorded when ``CEF_PROFILE_MEMORY=1`` is set
+in the environment. It comes from tracemalloc, which is process-wide: it
+slows every session down while it runs and its figures are approximate while
+other sessions are busy. Tracing is started by the first profile that wants it
+and stopped when the last one closes.
+
+Heavy libraries that only some features need are imported on first use
+inside ``timed_import(module)``, which shows the import as its own phase and
+exports how long it took as ``cef_import_seconds``.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import metrics
+
+PROFILE_ENV = "CEF_PROFILE"
+MEMORY_ENV = "CEF_PROFILE_MEMORY"
+
+LOG_PATH = Path(
+    os.environ.get(
+        "CEF_PROFILE_LOG",
+        Path(__file__).resolve().parent / ".cache" / "profile.jsonl"
+    )
+)
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+# Open profiles tracing memory, and whether tracing was started for them.
+_tracers = 0
+_tracing_started = False
+_tracing_lock = threading.Lock()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "") not in ("", "0")
+
+
+def _start_tracing() -> None:
+    global _tracers, _tracing_started
+
+    with _tracing_lock:
+        _tracers += 1
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+
+
+def _stop_tracing() -> None:
+    global _tracers, _tracing_started
+
+    with _tracing_lock:
+        _tracers -= 1
+
+        # Leave tracing alone if something else (e.g. -X tracemalloc) started it.
+        if _tracers == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+class Profile:
+    """Phase timings for one rerun of one page."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.phases = []
+        self.placeholder = None
+        self.written = False
+        self.closed = False
+        self.memory = _env_flag(MEMORY_ENV)
+        self._stack = []
+
+        if self.memory:
+            _start_tracing()
+
+    def close(self) -> None:
+        """Release this profile's hold on memory tracing, once."""
+        if self.closed:
+            return
+
+        self.closed = True
+
+        if self.memory:
+            _stop_tracing()
+
+    @contextmanager
+    def phase(self, name: str):
+        memory = self.memory
+
+        # Fold the peak seen so far into the enclosing phase before resetting.
+        if memory and self._stack:
+            self._stack[-1]["peak"] = max(
+                self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1]
+            )
+
+        if memory:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+        else:
+            current = 0
+
+        entry = {"base": current, "peak": current}
+        self._stack.append(entry)
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            self._stack.pop()
+            peak_kib = None
+
+            if memory:
+                peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+                peak_kib = round((peak - entry["base"]) / 1024, 1)
+
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+
+            self.phases.append({
+                "phase": name,
+                "depth": len(self._stack),
+                "wall_ms": round(wall * 1000, 2),
+                "peak_kib": peak_kib
+            })
+
+            if not self._stack:
+                self.refresh()
+
+    def record(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "page": self.page,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "phases": self.phases
+        }
+
+    def write(self) -> None:
+        """Append this rerun to the JSONL log, once."""
+        if self.written:
+            return
+
+        self.written = True
+
+        try:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with _log_lock, LOG_PATH.open("a", encoding="utf-8") as log:
+                log.write(json.dumps(self.record()) + "\n")
+        except OSError:
+            pass
+
+    def refresh(self) -> None:
+        """Redraw the on-page panel, if this rerun has one."""
+        if self.placeholder is None:
+            return
+
+        import streamlit as st
+
+        record = self.record()
+
+        with self.placeholder.container():
+            with st.expander(f"⏱ Rerun profile – {record['total_ms']} ms so far"):
+                rows = []
+
+                for p in record["phases"]:
+                    row = {"Phase": " " * p["depth"] + p["phase"], "Wall (ms)": p["wall_ms"]}
+                    if self.memory:
+                        row["Peak memory (KiB)"] = p["peak_kib"]
+                    rows.append(row)
+
+                st.table(rows)
+
+    def timed(self, name: str, fn):
+        """Wrap a deferred callable so its run is logged as its own record."""
+        page = self.page
+
+        def run():
+            profile = Profile(page)
+
+            try:
+                with activate(profile), profile.phase(name):
+                    result = fn()
+                profile.write()
+            finally:
+                profile.close()
+
+            return result
+
+        return run
+
+
+def active():
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def activate(profile):
+    previous = active()
+    _local.profile = profile
+
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+
+
+@contextmanager
+def phase(name: str):
+    """Time a phase of the current rerun; a no-op unless profiling is active."""
+    profile = active()
+
+    if profile is None:
+        yield
+        return
+
+    with profile.phase(name):
+        yield
+
+
+@contextmanager
+def timed_import(module: str):
+    """Time the imports in the block the first time ``module`` is loaded.
+
+    Once the module is in ``sys.modules`` the block runs untimed, so this can
+    wrap a function-local import that runs on every call.
+    """
+    if module in sys.modules:
+        yield
+        return
+
+    started = time.perf_counter()
+
+    with phase(f"import {module}"):
+        yield
+
+    metrics.set_gauge("cef_import_seconds", round(time.perf_counter() - started, 4), module=module)
+
+
+# ===================== PAGE HELPERS =====================
+
+def _requested() -> bool:
+    import streamlit as st
+
+    return _env_flag(PROFILE_ENV) or st.query_params.get("profile") == "1"
+
+
+def start_page_profile(page: str):
+    """Begin profiling this rerun if it was asked for; returns the Profile or None.
+
+    Call after the login gate. A rerun that ends early with ``st.stop()`` is
+    written to the log when the session's next rerun starts.
+    """
+    import streamlit as st
+
+    pending = st.session_state.pop("_pending_profile", None)
+    if pending is not None:
+        pending.write()
+        pending.close()
+
+    _local.profile = None
+
+    if not _requested():
+        return None
+
+    profile = Profile(page)
+    profile.placeholder = st.empty()
+    st.session_state["_pending_profile"] = profile
+    _local.profile = profile
+
+    return profile
+
+
+def finish_page_profile(profile) -> None:
+    """Write a completed rerun to the log and stop profiling the thread."""
+    import streamlit as st
+
+    if profile is None:
+        return
+
+    profile.refresh()
+    profile.write()
+    profile.close()
+    st.session_state.pop("_pending_profile", None)
+    _local.profile = None
+
+
+@contextmanager
+def fragment_profile(name: str):
+    """Profile a fragment body when the fragment reruns on its own.
+
+    During a full rerun the page profile already covers the fragment. A
+    fragment rerun gets its own panel, drawn inside the fragment because it
+    cannot write to the page's placeholder, and its own log record.
+    """
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not ctx.fragment_ids_this_run:
+        yield
+        return
+
+    profile = None
+    if _requested():
+        profile = Profile(name)
+        profile.placeholder = st.empty()
+
+    with activate(profile):
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.refresh()
+                profile.write()
+                profile.close()
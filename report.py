@@ -0,0 +1,890 @@
+"""PDF action plan reports and block team packs.
+
+Reports are only built when one is requested and are kept in a small
+LRU cache keyed by dataset hash, coach and block, so repeat downloads and
+switching back to a coach cost nothing.
+
+A team pack covers a whole block in one document, laid out in a single
+pass from the engine's block aggregates.
+
+Bulk exports lay out many reports at once. ReportLab is CPU-bound and single
+threaded, so those are spread over a process pool and zipped as they finish.
+
+ReportLab is only imported when the first report is laid out, so pages that
+link to a report do not pay for it until a PDF is actually built. The parts
+of a report that are the same for every coach (badge, styles, fixed table
+styles) are then built once per process in ``ReportTemplate``.
+"""
+
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+
+import metrics
+from colours import (
+    get_average_safeguarding_colour,
+    get_cef_total_colour,
+    get_group_colour,
+    get_safeguarding_colour
+)
+from constants import GROUP_LABELS, QUESTIONS_PER_GROUP, SAFEGUARDING_QUESTIONS
+from profiling import phase, timed_import
+from scoring import development_areas
+
+BADGE_PATH = Path(__file__).resolve().parent / "assets" / "mkdons_badge.png"
+
+# The badge is printed one inch square; 300 dpi is print quality.
+BADGE_SIZE_INCHES = 1.0
+BADGE_DPI = 300
+
+PDF_CACHE_SIZE = 32
+
+# A bulk export that takes longer than this is given up on, and the pool's
+# workers are replaced in case one of them is stuck.
+EXPORT_MIN_SECONDS = 60
+EXPORT_SECONDS_PER_REPORT = 2
+
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+
+_template = None
+_template_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ReportTemplate:
+    """Everything in the reports that does not depend on the scores.
+
+    Built once per process by ``report_template()``: the badge is decoded and
+    scaled to print size, paragraph styles are created rather than edited in
+    a fresh sample sheet, and the fixed table styles are laid out up front.
+    Reports share the template, so nothing here is changed after it is built.
+    """
+
+    def __init__(self):
+        with timed_import("reportlab.platypus"):
+            from PIL import Image as PILImage
+            from reportlab import rl_config
+            from reportlab.lib import colors
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+            from reportlab.lib.units import inch
+            from reportlab.lib.utils import ImageReader
+            from reportlab.platypus import TableStyle
+
+        # Write PDF streams as binary. ASCII85 only matters for 7-bit channels,
+        # and without ReportLab's C accelerator encoding the badge in pure
+        # Python was most of the time spent on every report.
+        rl_config.useA85 = 0
+
+        # ==============================
+        # COLOUR SCHEME
+        # ==============================
+        MK_GOLD = colors.HexColor("#C7A600")
+        MK_BLACK = colors.HexColor("#000000")
+        MK_LIGHT_GREY = colors.HexColor("#F4F4F4")
+
+        # Chart strokes and fills.
+        self.chart_line = MK_GOLD
+        self.chart_fill = colors.Color(MK_GOLD.red, MK_GOLD.green, MK_GOLD.blue, alpha=0.35)
+        self.chart_grid = colors.lightgrey
+
+        # Band colours are converted once rather than per table cell.
+        self.band_colours = {
+            hex_colour: colors.HexColor(hex_colour)
+            for hex_colour in ("#4CAF50", "#FFD966", "#F4A261", "#FF6B6B")
+        }
+
+        # ==============================
+        # BADGE
+        # ==============================
+        # The source PNG is far larger than the one inch it is printed at, and
+        # ReportLab re-encodes the pixels into every PDF.
+        badge_pixels = round(BADGE_SIZE_INCHES * BADGE_DPI)
+        with PILImage.open(BADGE_PATH) as badge:
+            badge = badge.convert("RGBA").resize((badge_pixels, badge_pixels), PILImage.LANCZOS)
+
+        self.badge = ImageReader(badge)
+        self.badge_size = BADGE_SIZE_INCHES * inch
+
+        # ==============================
+        # STYLES
+        # ==============================
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle("ReportTitle", parent=styles["Title"], textColor=MK_BLACK)
+        self.section_style = ParagraphStyle("ReportSection", parent=styles["Heading2"], textColor=MK_GOLD)
+        self.normal_style = styles["Normal"]
+
+        self.action_heading_orange = ParagraphStyle(
+            "ActionHeadingOrange",
+            parent=self.normal_style,
+            fontSize=9,
+            leading=11,
+            textColor=colors.HexColor("#F4A261")
+        )
+
+        self.action_heading_red = ParagraphStyle(
+            "ActionHeadingRed",
+            parent=self.normal_style,
+            fontSize=9,
+            leading=11,
+            textColor=colors.HexColor("#FF6B6B")
+        )
+
+        self.action_text_style = ParagraphStyle(
+            "ActionTextSmall",
+            parent=self.normal_style,
+            fontSize=8,
+            leading=11
+        )
+
+        # ==============================
+        # TABLE STYLES
+        # ==============================
+        self.header_style = TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("BACKGROUND", (0, 0), (-1, -1), MK_LIGHT_GREY),
+            ("LEFTPADDING", (0, 0), (-1, -1), 60),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 40),
+            ("TOPPADDING", (0, 0), (-1, -1), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+        ])
+
+        # Score grids: alignment and a white box around every cell. Only the
+        # background of each cell depends on the scores.
+        self.cef_cells = [(c, r) for r in range(-(-len(GROUP_LABELS) // 3)) for c in range(3)]
+        self.cef_commands = [
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ] + [
+            ("BOX", cell, cell, 1, colors.white)
+            for cell in self.cef_cells[:len(GROUP_LABELS)]
+        ]
+
+        self.safe_cells = [(c, 0) for c in range(len(SAFEGUARDING_QUESTIONS))]
+        self.safe_commands = [
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ] + [
+            ("BOX", cell, cell, 1, colors.white)
+            for cell in self.safe_cells
+        ]
+
+        # Team pack ranking: a header row, light rules, and a band colour on
+        # the CEF column that each pack adds per coach.
+        self.ranking_commands = [
+            ("BACKGROUND", (0, 0), (-1, 0), MK_LIGHT_GREY),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("ALIGN", (0, 0), (0, -1), "CENTER"),
+            ("ALIGN", (2, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("LINEBELOW", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ]
+
+        self.action_style = TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("BACKGROUND", (0, 0), (0, 0), colors.whitesmoke),
+            ("BACKGROUND", (1, 0), (1, 0), colors.whitesmoke),
+            ("BOX", (0, 0), (0, 0), 1, colors.lightgrey),
+            ("BOX", (1, 0), (1, 0), 1, colors.lightgrey),
+            ("LEFTPADDING", (0, 0), (-1, -1), 10),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+            ("TOPPADDING", (0, 0), (-1, -1), 8),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+        ])
+
+        # Decode now so concurrent reports only read the pixels.
+        self.badge.getRGBData()
+        self._badge_class, self._progress_class = _flowable_classes()
+
+    def badge_flowable(self):
+        """A new flowable for the badge; flowables keep per-document state."""
+        return self._badge_class(self.badge, self.badge_size)
+
+    def progress_mark(self, progress, done: int, total: int):
+        """An invisible flowable that reports (done, total) once it is laid out."""
+        return self._progress_class(progress, done, total)
+
+    def band_style(self, base_commands, cells, scores, colour):
+        """A score grid's fixed commands plus one background per scored cell."""
+        from reportlab.platypus import TableStyle
+
+        return TableStyle(base_commands + [
+            ("BACKGROUND", cell, cell, self.band_colours[colour(score)])
+            for cell, score in zip(cells, scores)
+        ])
+
+
+def _flowable_classes():
+    from reportlab.platypus import Flowable
+
+    class Badge(Flowable):
+        """Draws an already decoded image at a fixed square size."""
+
+        def __init__(self, image, size):
+            super().__init__()
+            self.image = image
+            self.width = self.height = size
+
+        def draw(self):
+            self.canv.drawImage(self.image, 0, 0, self.width, self.height, mask="auto")
+
+    class ProgressMark(Flowable):
+        """Takes no space; calls back as the layout passes it."""
+
+        def __init__(self, progress, done, total):
+            super().__init__()
+            self.progress = progress
+            self.done = done
+            self.total = total
+
+        def draw(self):
+            self.progress(self.done, self.total)
+
+    return Badge, ProgressMark
+
+
+def report_template() -> ReportTemplate:
+    """The process-wide report template, built on first use."""
+    global _template
+
+    # Checked before taking the lock: forked pool workers inherit the built
+    # template, and must not touch a lock another thread held at fork time.
+    if _template is not None:
+        return _template
+
+    with _template_lock:
+        if _template is None:
+            _template = ReportTemplate()
+
+    return _template
+
+
+# ===================== SECTIONS =====================
+# Flowables shared by the individual report and the block team pack.
+
+def _header(template, title: str) -> list:
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    header_table = Table(
+        [[template.badge_flowable(), Paragraph(f"<b>{title}</b>", template.title_style)]],
+        colWidths=[1.4 * inch, 8.0 * inch]
+    )
+
+    header_table.setStyle(template.header_style)
+
+    return [header_table, Spacer(1, 15)]
+
+
+def _group_grid(template, group_totals, colour=get_group_colour, row_height=0.8):
+    """The nine group scores as a three-column grid of coloured cells."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Table
+
+    cef_data = []
+    row = []
+
+    for i, (label, score) in enumerate(zip(GROUP_LABELS, group_totals)):
+        cell = Paragraph(
+            f"<para align='center'><b>{score}</b><br/><font size=7>{label}</font></para>",
+            template.normal_style
+        )
+        row.append(cell)
+
+        if (i + 1) % 3 == 0:
+            cef_data.append(row)
+            row = []
+
+    if row:
+        while len(row) < 3:
+            row.append("")
+        cef_data.append(row)
+
+    cef_table = Table(
+        cef_data,
+        colWidths=[2.6 * inch] * 3,
+        rowHeights=row_height * inch
+    )
+
+    cef_table.setStyle(template.band_style(
+        template.cef_commands, template.cef_cells, group_totals, colour
+    ))
+
+    return cef_table
+
+
+def _safeguarding_row(template, scores, colour=get_safeguarding_colour, row_height=0.8):
+    """The five safeguarding scores as one row of coloured cells."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Table
+
+    safe_row = []
+
+    for q, score in zip(SAFEGUARDING_QUESTIONS, scores):
+        cell = Paragraph(
+            f"<para align='center'><b>{score}</b><br/><font size=6>{q}</font></para>",
+            template.normal_style
+        )
+        safe_row.append(cell)
+
+    safe_table = Table(
+        [safe_row],
+        colWidths=[1.56 * inch] * len(SAFEGUARDING_QUESTIONS),
+        rowHeights=row_height * inch
+    )
+
+    safe_table.setStyle(template.band_style(
+        template.safe_commands, template.safe_cells, scores, colour
+    ))
+
+    return safe_table
+
+
+def _action_lists(template, half_scores, zero_scores, no_half, no_zero):
+    """"Consider Improving" and "Immediate Attention Needed" side by side."""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    action_text_style = template.action_text_style
+
+    # Left column
+    left_content = [
+        Paragraph("<b>Consider Improving</b>", template.action_heading_orange),
+        Spacer(1, 6)
+    ]
+
+    if half_scores:
+        for item in half_scores:
+            left_content.append(
+                Paragraph(f"• {item}", action_text_style)
+            )
+            left_content.append(Spacer(1, 4))
+    else:
+        left_content.append(Paragraph(no_half, action_text_style))
+
+    # Right column
+    right_content = [
+        Paragraph("<b>Immediate Attention Needed</b>", template.action_heading_red),
+        Spacer(1, 6)
+    ]
+
+    if zero_scores:
+        for item in zero_scores:
+            right_content.append(
+                Paragraph(f"• {item}", action_text_style)
+            )
+            right_content.append(Spacer(1, 4))
+    else:
+        right_content.append(Paragraph(no_zero, action_text_style))
+
+    action_table = Table(
+        [[left_content, right_content]],
+        colWidths=[3.8 * inch, 3.8 * inch]
+    )
+
+    action_table.setStyle(template.action_style)
+
+    return action_table
+
+
+def _cef_charts(template, group_totals, history_blocks, history_totals):
+    """Radar of the group totals beside the CEF total across blocks.
+
+    Both charts are ReportLab vector graphics, adding a few kilobytes and
+    a few tens of milliseconds to each report. Without a block history the
+    radar is drawn on its own.
+    """
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.charts.spider import SpiderChart
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.graphics.widgets.markers import makeMarker
+    from reportlab.lib.units import inch
+
+    drawing = Drawing(7.7 * inch, 2.9 * inch)
+    half = drawing.width / 2
+    radar_centre = half / 2 if len(history_totals) else half
+
+    drawing.add(String(radar_centre, drawing.height - 12, "Group Totals",
+                       fontName="Helvetica-Bold", fontSize=9, textAnchor="middle"))
+
+    # ==============================
+    # RADAR
+    # ==============================
+    # The spider chart scales to its largest value, so a full-marks strand
+    # fixes the scale and doubles as the outer ring.
+    radar = SpiderChart()
+    radar.x = radar_centre - 0.9 * inch
+    radar.y = 0.25 * inch
+    radar.width = radar.height = 1.8 * inch
+    radar.data = [[float(QUESTIONS_PER_GROUP)] * len(GROUP_LABELS), list(group_totals)]
+    radar.labels = GROUP_LABELS
+    radar.spokes.strokeColor = template.chart_grid
+    radar.spokeLabels.fontSize = 6
+
+    radar.strands[0].strokeColor = template.chart_grid
+    radar.strands[0].fillColor = None
+    radar.strands[1].strokeColor = template.chart_line
+    radar.strands[1].fillColor = template.chart_fill
+    radar.strands[1].strokeWidth = 1.5
+
+    drawing.add(radar)
+
+    if not len(history_totals):
+        return drawing
+
+    # ==============================
+    # CEF ACROSS BLOCKS
+    # ==============================
+    drawing.add(String(half * 1.5, drawing.height - 12, "CEF Score by Block",
+                       fontName="Helvetica-Bold", fontSize=9, textAnchor="middle"))
+
+    line = HorizontalLineChart()
+    line.x = half + 0.4 * inch
+    line.y = 0.45 * inch
+    line.width = half - 0.7 * inch
+    line.height = drawing.height - 0.9 * inch
+    line.data = [list(history_totals)]
+    line.joinedLines = 1
+    line.lines[0].strokeColor = template.chart_line
+    line.lines[0].strokeWidth = 1.5
+    line.lines[0].symbol = makeMarker("FilledCircle", size=4, fillColor=template.chart_line)
+    line.lineLabelFormat = "%s"
+    line.lineLabels.fontSize = 7
+
+    line.categoryAxis.categoryNames = list(history_blocks)
+    line.categoryAxis.labels.fontSize = 7
+    line.categoryAxis.labels.boxAnchor = "n"
+
+    # Long block histories would run their labels into each other.
+    if len(line.categoryAxis.categoryNames) > 6:
+        line.categoryAxis.labels.angle = 30
+        line.categoryAxis.labels.boxAnchor = "ne"
+
+    line.valueAxis.valueMin = 0
+    line.valueAxis.valueMax = 36
+    line.valueAxis.valueStep = 6
+    line.valueAxis.labels.fontSize = 7
+    line.valueAxis.visibleGrid = 1
+    line.valueAxis.gridStrokeColor = template.chart_grid
+
+    drawing.add(line)
+
+    return drawing
+
+
+def _document(buffer):
+    from reportlab.lib import pagesizes
+    from reportlab.platypus import SimpleDocTemplate
+
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=pagesizes.A4,
+        rightMargin=20,
+        leftMargin=20,
+        topMargin=0,
+        bottomMargin=20
+    )
+
+# ===================== INDIVIDUAL REPORT =====================
+
+def generate_pdf(
+    coach,
+    block,
+    group_totals,
+    cef_total,
+    safeguarding_scores,
+    safeguarding_total,
+    half_scores,
+    zero_scores,
+    history_blocks=(),
+    history_totals=()
+) -> bytes:
+    """Lay out the individual coach evaluation report.
+
+    ``history_blocks`` and ``history_totals`` are the coach's CEF totals in
+    block order, for the chart of CEF across blocks; the chart is left out
+    when they are empty.
+    """
+    from reportlab.platypus import Paragraph, Spacer
+
+    template = report_template()
+    normal_style = template.normal_style
+    section_style = template.section_style
+
+    buffer = BytesIO()
+    doc = _document(buffer)
+
+    elements = _header(template, "MK Dons – Coach Evaluation Report")
+
+    # ==============================
+    # COACH & BLOCK INFO
+    # ==============================
+    elements.append(Paragraph(f"<b>Coach:</b> {coach}", normal_style))
+    elements.append(Paragraph(f"<b>Block:</b> {block}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # CEF SECTION
+    # ==============================
+    elements.append(
+        Paragraph(
+            f"<b>CEF Breakdown (Total: {cef_total}/36)</b>",
+            section_style
+        )
+    )
+    elements.append(Spacer(1, 10))
+    elements.append(_group_grid(template, group_totals))
+    elements.append(Spacer(1, 10))
+
+    # ==============================
+    # SAFEGUARDING SECTION
+    # ==============================
+    elements.append(
+        Paragraph(
+            f"<b>Safeguarding (Total: {safeguarding_total}/5)</b>",
+            section_style
+        )
+    )
+    elements.append(Spacer(1, 10))
+    elements.append(_safeguarding_row(template, safeguarding_scores))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # ACTION PLAN SECTION
+    # ==============================
+    elements.append(Paragraph("<b>Action Plan</b>", section_style))
+    elements.append(Spacer(1, 8))
+    elements.append(_action_lists(
+        template,
+        half_scores,
+        zero_scores,
+        "No areas currently scored at 0.5.",
+        "No areas requiring immediate attention."
+    ))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # CHARTS
+    # ==============================
+    elements.append(Paragraph("<b>CEF Profile</b>", section_style))
+    elements.append(Spacer(1, 8))
+    elements.append(_cef_charts(template, group_totals, history_blocks, history_totals))
+
+    # ==============================
+    # BUILD PDF
+    # ==============================
+    doc.build(elements)
+
+    return buffer.getvalue()
+
+
+def coach_report_args(dataset, coach, block) -> tuple:
+    """Arguments for generate_pdf, read from the dataset's score engine."""
+    engine = dataset.engine
+    history_blocks, history_totals = engine.block_history(coach)
+
+    return (
+        coach,
+        block,
+        engine.coach_group_totals(coach, block),
+        engine.coach_cef_total(coach, block),
+        engine.coach_safeguarding(coach, block),
+        engine.coach_safeguarding_total(coach, block),
+        *engine.action_plan(coach, block),
+        history_blocks,
+        history_totals.sum(axis=0).round(2).tolist()
+    )
+
+
+def coach_report_pdf(dataset, coach, block) -> bytes:
+    """The coach's PDF report for a block, built once and then served from cache."""
+    key = (dataset.content_hash, coach, block)
+
+    with _reports_lock:
+        pdf = _reports.get(key)
+        if pdf is not None:
+            _reports.move_to_end(key)
+            metrics.inc("cef_pdf_cache_hits_total")
+            return pdf
+
+    metrics.inc("cef_pdf_cache_misses_total")
+
+    with phase("PDF build"):
+        pdf = generate_pdf(*coach_report_args(dataset, coach, block))
+
+    with _reports_lock:
+        _reports[key] = pdf
+        while len(_reports) > PDF_CACHE_SIZE:
+            _reports.popitem(last=False)
+
+    return pdf
+
+
+def report_file_name(coach, block) -> str:
+    return f"{coach}_{block}_Action_Plan.pdf"
+
+
+# ===================== TEAM PACK =====================
+
+def generate_team_pdf(block, question_cols, team, progress=None) -> bytes:
+    """Lay out the block team pack: a team summary, then a page per coach.
+
+    ``team`` is ``ScoreEngine.block_team_scores`` for the block and the
+    selected coaches. Everything goes through one document build; no
+    individual report is laid out. ``progress`` is called with (done, total)
+    as the summary and each coach page are laid out.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import PageBreak, Paragraph, Spacer, Table, TableStyle
+
+    template = report_template()
+    normal_style = template.normal_style
+    section_style = template.section_style
+
+    coaches = team["coaches"]
+    total = len(coaches) + 1
+    questions = [f"Q{i} – {q}" for i, q in enumerate(question_cols, start=1)]
+
+    buffer = BytesIO()
+    doc = _document(buffer)
+
+    elements = _header(template, "MK Dons – Block Team Report")
+
+    # ==============================
+    # BLOCK INFO
+    # ==============================
+    elements.append(Paragraph(f"<b>Block:</b> {block}", normal_style))
+    elements.append(Paragraph(f"<b>Coaches:</b> {len(coaches)}", normal_style))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # TEAM AVERAGES
+    # ==============================
+    group_averages = team["group_averages"].tolist()
+
+    elements.append(
+        Paragraph(
+            f"<b>Average CEF Breakdown (Average: {round(sum(group_averages), 2)}/36)</b>",
+            section_style
+        )
+    )
+    elements.append(Spacer(1, 10))
+    elements.append(_group_grid(template, group_averages))
+    elements.append(Spacer(1, 10))
+
+    # ==============================
+    # SAFEGUARDING AVERAGES
+    # ==============================
+    question_means = team["question_means"].tolist()
+    safe_means = [question_means[question_cols.index(q)] for q in SAFEGUARDING_QUESTIONS]
+
+    elements.append(
+        Paragraph(
+            f"<b>Average Safeguarding (Average: {round(sum(safe_means), 2)}/5)</b>",
+            section_style
+        )
+    )
+    elements.append(Spacer(1, 10))
+    elements.append(_safeguarding_row(template, safe_means, get_average_safeguarding_colour))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # DEVELOPMENT AREAS
+    # ==============================
+    improve, attention = development_areas(question_cols, question_means)
+
+    elements.append(Paragraph("<b>Team Development Areas</b>", section_style))
+    elements.append(Spacer(1, 8))
+    elements.append(_action_lists(
+        template,
+        improve,
+        attention,
+        "No development areas currently identified.",
+        "No immediate attention areas currently identified."
+    ))
+    elements.append(Spacer(1, 12))
+
+    # ==============================
+    # COACH RANKING
+    # ==============================
+    cef_totals = team["cef_totals"].tolist()
+    safeguarding_totals = team["safeguarding_totals"].tolist()
+
+    elements.append(Paragraph("<b>Coach Scores</b>", section_style))
+    elements.append(Spacer(1, 8))
+
+    ranking = Table(
+        [["#", "Coach", "CEF / 36", "Safeguarding / 5"]] + [
+            [rank, coach, cef_total, safeguarding_total]
+            for rank, (coach, cef_total, safeguarding_total) in enumerate(
+                zip(coaches, cef_totals, safeguarding_totals), start=1
+            )
+        ],
+        colWidths=[0.5 * inch, 4.2 * inch, 1.4 * inch, 1.6 * inch],
+        repeatRows=1
+    )
+
+    ranking.setStyle(TableStyle(template.ranking_commands + [
+        ("BACKGROUND", (2, row), (2, row), template.band_colours[get_cef_total_colour(cef_total)])
+        for row, cef_total in enumerate(cef_totals, start=1)
+    ]))
+    elements.append(ranking)
+
+    if progress is not None:
+        elements.append(template.progress_mark(progress, 1, total))
+
+    # ==============================
+    # COACH PAGES
+    # ==============================
+    rows = zip(
+        coaches,
+        team["group_totals"].tolist(),
+        cef_totals,
+        team["safeguarding"].tolist(),
+        safeguarding_totals,
+        team["half"],
+        team["zero"]
+    )
+
+    for i, (coach, group_totals, cef_total, safeguarding, safeguarding_total, half, zero) in enumerate(rows):
+        elements.append(PageBreak())
+        elements.append(Paragraph(f"{i + 1}. {coach}", template.title_style))
+        elements.append(Spacer(1, 6))
+
+        elements.append(Paragraph(f"<b>CEF Breakdown (Total: {cef_total}/36)</b>", section_style))
+        elements.append(Spacer(1, 6))
+        elements.append(_group_grid(template, group_totals, row_height=0.6))
+        elements.append(Spacer(1, 8))
+
+        elements.append(Paragraph(f"<b>Safeguarding (Total: {safeguarding_total}/5)</b>", section_style))
+        elements.append(Spacer(1, 6))
+        elements.append(_safeguarding_row(template, safeguarding, row_height=0.6))
+        elements.append(Spacer(1, 10))
+
+        elements.append(Paragraph("<b>Action Plan</b>", section_style))
+        elements.append(Spacer(1, 6))
+        elements.append(_action_lists(
+            template,
+            [questions[j] for j in half.nonzero()[0]],
+            [questions[j] for j in zero.nonzero()[0]],
+            "No areas currently scored at 0.5.",
+            "No areas requiring immediate attention."
+        ))
+
+        if progress is not None:
+            elements.append(template.progress_mark(progress, i + 2, total))
+
+    # ==============================
+    # BUILD PDF
+    # ==============================
+    doc.build(elements)
+
+    return buffer.getvalue()
+
+
+def team_report_pdf(dataset, block, coaches, progress=None) -> bytes:
+    """The block team pack for the selected coaches."""
+    team = dataset.engine.block_team_scores(block, coaches)
+
+    with phase("PDF build"):
+        return generate_team_pdf(block, dataset.question_cols, team, progress)
+
+
+def team_report_file_name(block) -> str:
+    return f"{block.replace(' ', '_')}_Team_Report.pdf"
+
+# ===================== BULK EXPORT =====================
+
+def _process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every bulk export, started on first use."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # Build the template here so forked workers inherit it instead of
+            # each importing ReportLab and decoding the badge themselves.
+            report_template()
+
+            # Spawned or forkserver workers re-import __main__, which under
+            # Streamlit is the page script itself. Forked workers inherit the
+            # loaded modules and only ever run generate_pdf.
+            context = multiprocessing.get_context("fork")
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=context
+            )
+
+    return _pool
+
+
+def _discard_pool(pool) -> None:
+    """Shut down a broken or stuck pool so the next export starts a fresh one."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+    metrics.inc("cef_report_pool_restarts_total")
+
+    # shutdown() does not stop a worker that is stuck, so terminate them too.
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for process in processes:
+        process.terminate()
+
+
+def export_reports_zip(dataset, pairs, progress=None) -> bytes:
+    """Render the report for every (coach, block) pair into one zip archive.
+
+    ``progress`` is called with (done, total) as each report is written. If a
+    worker dies, the reports still outstanding are retried once on a new pool.
+    """
+    pairs = list(pairs)
+    timeout = max(EXPORT_MIN_SECONDS, EXPORT_SECONDS_PER_REPORT * len(pairs))
+    written = set()
+    buffer = BytesIO()
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for attempt in range(2):
+            pool = _process_pool()
+
+            try:
+                futures = {
+                    pool.submit(generate_pdf, *coach_report_args(dataset, coach, block)): (coach, block)
+                    for coach, block in pairs
+                    if (coach, block) not in written
+                }
+
+                for future in as_completed(futures, timeout=timeout):
+                    coach, block = futures[future]
+                    archive.writestr(f"{block}/{report_file_name(coach, block)}", future.result())
+                    written.add((coach, block))
+
+                    if progress is not None:
+                        progress(len(written), len(pairs))
+
+                break
+            except BrokenProcessPool:
+                _discard_pool(pool)
+
+                if attempt:
+                    raise
+            except TimeoutError:
+                _discard_pool(pool)
+                raise TimeoutError(
+                    f"Bulk export did not finish within {timeout} seconds"
+                ) from None
+
+    return buffer.getvalue()
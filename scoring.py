@@ -0,0 +1,335 @@
+"""Vectorized CEF scoring.
+
+Answers are decoded once into a dense (coaches, blocks, questions) array with
+NaN for anything missing. Group, CEF and safeguarding totals are then plain
+axis reductions, so the pages no longer loop over question groups for every
+coach and block.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    GROUP_LABELS,
+    MISSING_CODE,
+    QUESTIONS_PER_GROUP,
+    SAFEGUARDING_QUESTIONS,
+    SCORE_SCALE
+)
+
+
+class ScoreEngine:
+    """Scores for every (coach, block) pair in a dataset."""
+
+    def __init__(self, scores: pd.DataFrame, question_cols: list):
+        """``scores`` holds int8 answer codes, as stored in the dataset."""
+        coach_codes, coaches = pd.factorize(scores["Full Name"], sort=True)
+        block_codes, blocks = pd.factorize(scores["Block_Name"], sort=True)
+
+        self.question_cols = list(question_cols)
+        self.coaches = list(coaches)
+        self.blocks = list(blocks)
+        self.coach_index = {name: i for i, name in enumerate(self.coaches)}
+        self.block_index = {name: i for i, name in enumerate(self.blocks)}
+
+        n_questions = len(self.question_cols)
+        n_groups = -(-n_questions // QUESTIONS_PER_GROUP)
+
+        # Pad to whole groups so a short final group reshapes like the rest.
+        values = np.full(
+            (len(self.coaches), len(self.blocks), n_groups * QUESTIONS_PER_GROUP),
+            np.nan
+        )
+        codes = scores[self.question_cols].to_numpy()
+        values[coach_codes, block_codes, :n_questions] = np.where(
+            codes == MISSING_CODE, np.nan, codes / SCORE_SCALE
+        )
+
+        # Blocks are indexed in name order ("Block 10" before "Block 2");
+        # block_order lists them by block number instead.
+        block_numbers = np.zeros(len(self.blocks), dtype=np.int64)
+        block_numbers[block_codes] = scores["Block_Number"].to_numpy()
+        self.block_order = np.argsort(block_numbers, kind="stable")
+
+        present = np.zeros((len(self.coaches), len(self.blocks)), dtype=bool)
+        present[coach_codes, block_codes] = True
+
+        self.values = values[:, :, :n_questions]
+        self.present = present
+
+        self.group_totals = np.round(
+            np.nansum(
+                values.reshape(
+                    len(self.coaches), len(self.blocks), n_groups, QUESTIONS_PER_GROUP
+                ),
+                axis=3
+            ),
+            2
+        )
+        self.cef_totals = np.round(self.group_totals.sum(axis=2), 2)
+
+        self.safeguarding_positions = [
+            self.question_cols.index(q) for q in SAFEGUARDING_QUESTIONS
+        ]
+        self.safeguarding = self.values[:, :, self.safeguarding_positions]
+        # A missing safeguarding answer leaves the total undefined, as on screen.
+        self.safeguarding_totals = self.safeguarding.sum(axis=2)
+
+    # ===================== SINGLE COACH =====================
+
+    def _pos(self, coach, block) -> tuple:
+        return self.coach_index[coach], self.block_index[block]
+
+    def has(self, coach, block) -> bool:
+        """Whether the coach submitted a response in the block."""
+        if coach not in self.coach_index or block not in self.block_index:
+            return False
+
+        return bool(self.present[self._pos(coach, block)])
+
+    def question_scores(self, coach, block) -> np.ndarray:
+        return self.values[self._pos(coach, block)]
+
+    def coach_group_totals(self, coach, block) -> list:
+        return self.group_totals[self._pos(coach, block)].tolist()
+
+    def coach_cef_total(self, coach, block) -> float:
+        return float(self.cef_totals[self._pos(coach, block)])
+
+    def coach_safeguarding(self, coach, block) -> list:
+        return self.safeguarding[self._pos(coach, block)].tolist()
+
+    def coach_safeguarding_total(self, coach, block) -> float:
+        return float(self.safeguarding_totals[self._pos(coach, block)])
+
+    def action_plan(self, coach, block) -> tuple:
+        """Questions scored 0.5 ("Consider Improving") and 0 ("Immediate Attention")."""
+        scores = self.question_scores(coach, block)
+
+        half_scores = [
+            f"Q{i} – {q}"
+            for i, (q, s) in enumerate(zip(self.question_cols, scores), start=1)
+            if s == 0.5
+        ]
+        zero_scores = [
+            f"Q{i} – {q}"
+            for i, (q, s) in enumerate(zip(self.question_cols, scores), start=1)
+            if s == 0
+        ]
+
+        return half_scores, zero_scores
+
+    def block_history(self, coach) -> tuple:
+        """Block names and a (group, block) matrix of group totals.
+
+        Covers every block the coach has a response in, in block-number order.
+        """
+        c = self.coach_index[coach]
+        order = self.block_order[self.present[c, self.block_order]]
+
+        return [self.blocks[b] for b in order], self.group_totals[c, order].T
+
+    def pair_scores(self, pairs) -> dict:
+        """Scores for many (coach, block) pairs, gathered in one indexed lookup.
+
+        Pairs without a response are left out.
+        """
+        found = [pair for pair in pairs if self.has(*pair)]
+
+        coach_pos = np.array([self.coach_index[c] for c, _ in found], dtype=np.intp)
+        block_pos = np.array([self.block_index[b] for _, b in found], dtype=np.intp)
+
+        return {
+            "pairs": found,
+            "group_totals": self.group_totals[coach_pos, block_pos],
+            "cef_totals": self.cef_totals[coach_pos, block_pos],
+            "safeguarding": self.safeguarding[coach_pos, block_pos],
+            "safeguarding_totals": self.safeguarding_totals[coach_pos, block_pos]
+        }
+
+    def results(self) -> pd.DataFrame:
+        """One row per (coach, block) response with every figure the pages show."""
+        coach_pos, block_pos = np.nonzero(self.present)
+        order = np.lexsort((coach_pos, block_pos))
+        coach_pos, block_pos = coach_pos[order], block_pos[order]
+
+        df = pd.DataFrame({
+            "coach": [self.coaches[c] for c in coach_pos],
+            "block": [self.blocks[b] for b in block_pos]
+        })
+
+        group_totals = self.group_totals[coach_pos, block_pos]
+        for i, label in enumerate(GROUP_LABELS[:group_totals.shape[1]]):
+            df[label] = group_totals[:, i]
+
+        df["cef_total"] = self.cef_totals[coach_pos, block_pos]
+
+        safeguarding = self.safeguarding[coach_pos, block_pos]
+        for i, question in enumerate(SAFEGUARDING_QUESTIONS):
+            df[question] = safeguarding[:, i]
+
+        df["safeguarding_total"] = self.safeguarding_totals[coach_pos, block_pos]
+
+        plans = [
+            self.action_plan(coach, block)
+            for coach, block in zip(df["coach"], df["block"])
+        ]
+        df["consider_improving"] = [half for half, _ in plans]
+        df["immediate_attention"] = [zero for _, zero in plans]
+
+        return df
+
+    # ===================== BLOCK AVERAGES =====================
+
+    def _block_rows(self, block, coaches) -> tuple:
+        """Coach positions within a block, restricted to those who responded."""
+        b = self.block_index[block]
+        rows = np.array(
+            [self.coach_index[c] for c in coaches if c in self.coach_index],
+            dtype=np.intp
+        )
+
+        return rows[self.present[rows, b]], b
+
+    def block_coach_totals(self, block, coaches) -> dict:
+        """CEF total per coach in a block."""
+        rows, b = self._block_rows(block, coaches)
+
+        return {
+            self.coaches[r]: total
+            for r, total in zip(rows, self.cef_totals[rows, b].tolist())
+        }
+
+    def block_group_averages(self, block, coaches) -> list:
+        rows, b = self._block_rows(block, coaches)
+
+        return np.round(self.group_totals[rows, b].mean(axis=0), 2).tolist()
+
+    def block_question_means(self, block, coaches) -> list:
+        rows, b = self._block_rows(block, coaches)
+
+        with warnings.catch_warnings():
+            # A question nobody answered has no mean, as with pandas.
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            means = np.nanmean(self.values[rows, b], axis=0)
+
+        return np.round(means, 2).tolist()
+
+    def block_safeguarding_means(self, block, coaches) -> list:
+        means = self.block_question_means(block, coaches)
+
+        return [means[i] for i in self.safeguarding_positions]
+
+    def block_team_scores(self, block, coaches) -> dict:
+        """Everything the block team report needs, gathered in one pass.
+
+        Coaches who responded in the block are ranked by CEF total, highest
+        first. "half" and "zero" are (coach, question) masks of the answers
+        behind each coach's action plan.
+        """
+        rows, b = self._block_rows(block, coaches)
+        order = np.argsort(-self.cef_totals[rows, b], kind="stable")
+        rows = rows[order]
+        values = self.values[rows, b]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            question_means = np.round(np.nanmean(values, axis=0), 2)
+
+        return {
+            "coaches": [self.coaches[r] for r in rows],
+            "group_totals": self.group_totals[rows, b],
+            "cef_totals": self.cef_totals[rows, b],
+            "safeguarding": self.safeguarding[rows, b],
+            "safeguarding_totals": self.safeguarding_totals[rows, b],
+            "group_averages": np.round(self.group_totals[rows, b].mean(axis=0), 2),
+            "question_means": question_means,
+            "half": values == 0.5,
+            "zero": values == 0
+        }
+
+
+def development_areas(question_cols, question_means) -> tuple:
+    """Questions a block should work on, from its average score per question.
+
+    Returns ("Consider Improving", "Immediate Attention Needed") item lists.
+    """
+    improve = []
+    attention = []
+
+    for i, (q_col, avg_score) in enumerate(zip(question_cols, question_means), start=1):
+        if avg_score <= 0.5:
+            attention.append(f"Q{i} – {q_col} ({avg_score})")
+
+        elif avg_score <= 0.75:
+            improve.append(f"Q{i} – {q_col} ({avg_score})")
+
+    return improve, attention
+
+
+class BlockSubset:
+    """Running block averages for a changing selection of coaches.
+
+    Selecting or deselecting a coach adds or subtracts that coach's
+    precomputed vectors, so each toggle costs O(questions) regardless of how
+    many coaches are in the block. Scores are multiples of 0.5, so the running
+    sums stay exact.
+    """
+
+    def __init__(self, engine: ScoreEngine, block):
+        self.engine = engine
+        self.block = block
+        self.members = set()
+
+        self._b = engine.block_index[block]
+        self._group_sum = np.zeros(engine.group_totals.shape[2])
+        self._question_sum = np.zeros(len(engine.question_cols))
+        self._question_count = np.zeros(len(engine.question_cols))
+
+    def _apply(self, coach, sign: int) -> None:
+        c = self.engine.coach_index[coach]
+
+        if not self.engine.present[c, self._b]:
+            return
+
+        row = self.engine.values[c, self._b]
+
+        self._group_sum += sign * self.engine.group_totals[c, self._b]
+        self._question_sum += sign * np.nan_to_num(row)
+        self._question_count += sign * ~np.isnan(row)
+
+    def update(self, coaches) -> None:
+        """Bring the running sums in line with a new selection."""
+        selected = {
+            c for c in coaches
+            if c in self.engine.coach_index
+            and self.engine.present[self.engine.coach_index[c], self._b]
+        }
+
+        for coach in selected - self.members:
+            self._apply(coach, 1)
+
+        for coach in self.members - selected:
+            self._apply(coach, -1)
+
+        self.members = selected
+
+    def group_averages(self) -> list:
+        return np.round(self._group_sum / len(self.members), 2).tolist()
+
+    def question_means(self) -> list:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(
+                self._question_count > 0,
+                self._question_sum / self._question_count,
+                np.nan
+            )
+
+        return np.round(means, 2).tolist()
+
+    def safeguarding_means(self) -> list:
+        means = self.question_means()
+
+        return [means[i] for i in self.engine.safeguarding_positions]